@@ -218,7 +218,7 @@ async def get_current_status():
 @router.get("/runs")
 async def get_analysis_runs(db: Session = Depends(get_db)):
     """List all analysis runs."""
-    runs = db.query(AnalysisRun).order_by(desc(AnalysisRun.timestamp)).all()
+    runs = db.query(AnalysisRun).filter(AnalysisRun.is_active == True).order_by(desc(AnalysisRun.timestamp)).all()
     return [{
         "id": r.id,
         # Append Z to indicate UTC timezone, as timestamps in DB are naive UTC
@@ -240,7 +240,8 @@ async def get_market_breadth_by_stock_list(
     # First, try to find a dedicated run for this stock list
     latest_run = db.query(AnalysisRun).filter(
         AnalysisRun.stock_list_name == stock_list,
-        AnalysisRun.status == "completed"
+        AnalysisRun.status == "completed",
+        AnalysisRun.is_active == True
     ).order_by(desc(AnalysisRun.timestamp)).first()
     
     run_id = latest_run.id if latest_run else None
@@ -269,7 +270,8 @@ async def get_market_breadth_by_stock_list(
         # ticker=stock_list_name (e.g. "stocks_soxx.tab") and interval="ALL"
         multi_run = db.query(AnalysisRun).filter(
             AnalysisRun.stock_list_name == "multi_index",
-            AnalysisRun.status == "completed"
+            AnalysisRun.status == "completed",
+            AnalysisRun.is_active == True
         ).order_by(desc(AnalysisRun.timestamp)).first()
         
         if multi_run:
@@ -301,7 +303,8 @@ async def get_market_breadth_by_stock_list(
     # Also check multi-index run if it's different from run_id
     multi_run = db.query(AnalysisRun).filter(
         AnalysisRun.stock_list_name == "multi_index",
-        AnalysisRun.status == "completed"
+        AnalysisRun.status == "completed",
+        AnalysisRun.is_active == True
     ).order_by(desc(AnalysisRun.timestamp)).first()
     if multi_run and multi_run.id != run_id:
         run_ticker_pairs.append((multi_run.id, stock_list))
@@ -573,7 +576,7 @@ def get_logs(lines: int = 100):
 async def get_signals_1234(ticker: str, db: Session = Depends(get_db)):
     """Get 1234 CD/MC signal dates for a specific ticker from the latest analysis run."""
     # Get latest analysis run
-    latest_run = db.query(AnalysisRun).order_by(desc(AnalysisRun.id)).first()
+    latest_run = db.query(AnalysisRun).filter(AnalysisRun.is_active == True).order_by(desc(AnalysisRun.id)).first()
     if not latest_run:
         logger.info(f"No analysis run found for signals_1234/{ticker}")
         return {"cd_dates": [], "mc_dates": []}
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -15,10 +15,36 @@ engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
 
+# WAL lets the analysis workers write while the API reads, and with
+# synchronous=NORMAL a commit no longer waits for an fsync of the main database
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    cursor.execute("PRAGMA cache_size=-65536")  # 64 MB
+    cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+def migrate_schema():
+    """
+    Add columns introduced after a database was first created; create_all only
+    creates missing tables, not missing columns.
+    """
+    inspector = inspect(engine)
+    if "analysis_runs" not in inspector.get_table_names():
+        return
+    columns = {column["name"] for column in inspector.get_columns("analysis_runs")}
+    if "is_active" not in columns:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE analysis_runs ADD COLUMN is_active BOOLEAN DEFAULT 1"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_analysis_runs_is_active ON analysis_runs (is_active)"))
+
 def get_db():
     db = SessionLocal()
     try:
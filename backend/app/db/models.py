@@ -1,7 +1,45 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, BigInteger, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, BigInteger, Text, Boolean, LargeBinary
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
+import json
+import zlib
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class CompressedJSON(TypeDecorator):
+    """
+    JSON value stored as a zlib-compressed BLOB. The first byte is a format
+    version; rows written as plain JSON text before this type existed are
+    still read back transparently.
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    FORMAT_ZLIB_JSON = b'\x01'
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        payload = orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS) if orjson is not None else json.dumps(value).encode('utf-8')
+        return self.FORMAT_ZLIB_JSON + zlib.compress(payload)
+
+    def result_processor(self, dialect, coltype):
+        # Replaces the binary result processor: legacy rows come back as str
+        def process(value):
+            if value is None:
+                return None
+            if isinstance(value, str):
+                return json.loads(value)
+            value = bytes(value)
+            if value[:1] == self.FORMAT_ZLIB_JSON:
+                value = zlib.decompress(value[1:])
+            return orjson.loads(value) if orjson is not None else json.loads(value)
+        return process
 
 class AnalysisRun(Base):
     __tablename__ = "analysis_runs"
@@ -10,6 +48,8 @@ class AnalysisRun(Base):
     timestamp = Column(DateTime, default=datetime.utcnow)
     stock_list_name = Column(String, index=True)
     status = Column(String, default="pending")  # pending, completed, failed
+    # Superseded runs are only deactivated; purge_inactive_runs deletes them later
+    is_active = Column(Boolean, default=True, index=True)
     
     results = relationship("AnalysisResult", back_populates="run", cascade="all, delete-orphan")
 
@@ -22,9 +62,9 @@ class AnalysisResult(Base):
     interval = Column(String, index=True)
     result_type = Column(String, index=True) # e.g., 'cd_eval_detailed', 'best_intervals_50', 'breakout_1234'
     
-    # Store dynamic metrics (test_count_0..100, etc.) in a JSON column
+    # Store dynamic metrics (test_count_0..100, etc.) in a compressed JSON column
     # This avoids creating a table with 300+ columns
-    data = Column(JSON)
+    data = Column(CompressedJSON)
     
     run = relationship("AnalysisRun", back_populates="results")
 
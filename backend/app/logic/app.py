@@ -4,11 +4,21 @@ import os
 import time
 from stock_analyzer import analyze_stocks
 import re
+import ast
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
 from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode, DataReturnMode
 import numpy as np
 
+# Serialize figures with orjson; st.plotly_chart goes through plotly's JSON
+# encoder on every rerun and the stdlib engine is several times slower.
+# Plotly rejects the engine when orjson is not installed, so keep the default then.
+try:
+    pio.json.config.default_engine = 'orjson'
+except ValueError:
+    pass
+
 # Set page configuration
 st.set_page_config(
     page_title="Stock Analysis App",
@@ -579,8 +589,9 @@ else:
     st.header("Results")
     st.info("Please select a stock list to view corresponding results.")
 
-# Function to load and display results
-def load_results(file_pattern, stock_list_file=None, default_sort=None):
+# Find the most recent result file in the output directory matching the pattern
+# (and stock list). Returns (latest_file, None) or (None, error message).
+def _find_latest_result_file(file_pattern, stock_list_file=None):
     # Look in output directory for result files
     output_dir = './output'
     if not os.path.exists(output_dir):
@@ -603,23 +614,748 @@ def load_results(file_pattern, stock_list_file=None, default_sort=None):
             return None, "No results found. Please run an analysis first."
     
     # Get the most recent file
-    latest_file = max(result_files, key=lambda f: os.path.getctime(os.path.join(output_dir, f)))
-    file_path = os.path.join(output_dir, latest_file)
+    return max(result_files, key=lambda f: os.path.getctime(os.path.join(output_dir, f))), None
+
+# Function to load and display results
+def load_results(file_pattern, stock_list_file=None, default_sort=None):
+    latest_file, message = _find_latest_result_file(file_pattern, stock_list_file)
+    if latest_file is None:
+        return None, message
+    file_path = os.path.join('./output', latest_file)
     
     try:
-        # Determine file type and load accordingly
-        if latest_file.endswith('.csv'):
-            df = pd.read_csv(file_path)
-        else:  # .tab files
-            df = pd.read_csv(file_path, sep='\t')
-            
-        if default_sort and default_sort in df.columns:
-            df = df.sort_values(by=default_sort, ascending=False)
-            
+        df = _read_result_file(file_path, default_sort, os.path.getmtime(file_path))
         return df, latest_file
     except Exception as e:
         return None, f"Error loading results: {e}"
 
+# Load a breakout candidates/details file restricted to the most recent `days`
+# days, with the date column formatted for display. The date parsing, cutoff
+# and dtype casts are cached per file mtime and calendar day.
+def load_recent_results(file_pattern, stock_list_file, date_col, days=60, bool_cols=()):
+    latest_file, message = _find_latest_result_file(file_pattern, stock_list_file)
+    if latest_file is None:
+        return None, message
+    file_path = os.path.join('./output', latest_file)
+    
+    try:
+        df = _read_recent_result_file(file_path, date_col, os.path.getmtime(file_path),
+                                      days, tuple(bool_cols), pd.Timestamp.now().normalize())
+        return df, latest_file
+    except Exception as e:
+        return None, f"Error loading results: {e}"
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _read_recent_result_file(file_path, date_col, mtime, days, bool_cols, today):
+    df = _read_result_file(file_path, date_col, mtime)
+    if date_col in df.columns:
+        df[date_col] = pd.to_datetime(df[date_col])
+        cutoff_date = today - pd.Timedelta(days=days)
+        df = df[df[date_col] >= cutoff_date].copy()
+        for col in bool_cols:
+            if col in df.columns:
+                df[col] = df[col].astype(bool)
+        # Arrow-backed strings keep the formatted dates in packed buffers instead
+        # of one Python object per cell
+        df[date_col] = df[date_col].dt.strftime('%Y-%m-%d').astype('string[pyarrow]')
+    return df
+
+# (file name, mtime) of the latest result file; changes whenever a newer or
+# rewritten file would be picked up by load_results.
+def result_file_version(file_pattern, stock_list_file=None):
+    latest_file, _ = _find_latest_result_file(file_pattern, stock_list_file)
+    if latest_file is None:
+        return None
+    return latest_file, os.path.getmtime(os.path.join('./output', latest_file))
+
+# Load only the rows of the latest result file for one (ticker, interval).
+# The filtered slice is cached separately, so a rerun copies a handful of rows
+# out of the cache instead of the whole results frame. Returns None when the
+# file is missing, unreadable or has no ticker/interval columns.
+def load_result_rows(file_pattern, stock_list_file, ticker, interval):
+    latest_file, _ = _find_latest_result_file(file_pattern, stock_list_file)
+    if latest_file is None:
+        return None
+    file_path = os.path.join('./output', latest_file)
+    
+    try:
+        return _read_result_rows(file_path, os.path.getmtime(file_path), ticker, interval)
+    except Exception:
+        return None
+
+# Parse a result file from disk once per (path, mtime) for the whole process.
+# The frame is shared, not copied, so callers must treat it as read-only.
+@st.cache_resource(max_entries=32)
+def _read_result_table(file_path, mtime):
+    # Determine file type and load accordingly
+    if file_path.endswith('.csv'):
+        return pd.read_csv(file_path)
+    else:  # .tab files
+        return pd.read_csv(file_path, sep='\t')
+
+# Sorted copy of a result file per (path, sort, mtime). The page calls load_results
+# several times on every rerun, so unchanged files are served from the cache;
+# a rewritten file gets a new mtime and is re-read.
+@st.cache_data(show_spinner=False, max_entries=32)
+def _read_result_file(file_path, default_sort, mtime):
+    df = _read_result_table(file_path, mtime)
+
+    if default_sort and default_sort in df.columns:
+        df = df.sort_values(by=default_sort, ascending=False)
+    else:
+        # Keep the attrs below off the shared table
+        df = df.copy(deep=False)
+
+    # Interval choices of the whole file, for filters shown before any row filtering
+    if 'interval' in df.columns:
+        df.attrs['intervals'] = tuple(sorted(df['interval'].unique()))
+
+    return df
+
+# Result file indexed on a sorted (ticker, interval) MultiIndex. Kept as a shared
+# read-only resource so per-ticker lookups are an index search, not a full scan.
+@st.cache_resource(max_entries=32)
+def _index_result_file(file_path, mtime):
+    df = _read_result_table(file_path, mtime)
+    if 'ticker' not in df.columns or 'interval' not in df.columns:
+        return None
+    return df.set_index(['ticker', 'interval'], drop=False).sort_index()
+
+# The price_history/volume_history columns hold stringified {period: value}
+# dicts; they are parsed here once rather than on every chart render.
+@st.cache_data(show_spinner=False, max_entries=256)
+def _read_result_rows(file_path, mtime, ticker, interval):
+    indexed_df = _index_result_file(file_path, mtime)
+    if indexed_df is None:
+        return None
+    try:
+        rows = indexed_df.loc[[(ticker, interval)]].reset_index(drop=True)
+    except KeyError:
+        rows = indexed_df.iloc[0:0].reset_index(drop=True)
+    for column in ('price_history', 'volume_history'):
+        if column in rows.columns:
+            rows[column] = rows[column].map(_parse_history)
+    return rows
+
+def _parse_history(value):
+    if isinstance(value, str):
+        try:
+            value = ast.literal_eval(value)
+        except Exception:
+            # If parsing fails, silently set to empty dict to avoid spam
+            return {}
+    return value if isinstance(value, dict) else {}
+
+# Long (period -> avg_return, avg_volume) view of the wide avg_return_N /
+# avg_volume_N columns of one (ticker, interval) row, so the chart fallback
+# reads a tidy frame instead of scanning ~200 flat columns on every render.
+def load_period_summary(file_pattern, stock_list_file, ticker, interval):
+    latest_file, _ = _find_latest_result_file(file_pattern, stock_list_file)
+    if latest_file is None:
+        return None
+    file_path = os.path.join('./output', latest_file)
+    
+    try:
+        return _read_period_summary(file_path, os.path.getmtime(file_path), ticker, interval)
+    except Exception:
+        return None
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _read_period_summary(file_path, mtime, ticker, interval):
+    rows = _read_result_rows(file_path, mtime, ticker, interval)
+    if rows is None or rows.empty:
+        return None
+    row = rows.iloc[0]
+    summary = {}
+    for column in ('avg_return', 'avg_volume'):
+        values = row.filter(regex=rf'^{column}_\d+$')
+        values.index = values.index.str.rsplit('_', n=1).str[-1].astype(int)
+        summary[column] = pd.to_numeric(values, errors='coerce')
+    return pd.DataFrame(summary, columns=['avg_return', 'avg_volume']).sort_index().rename_axis('period')
+
+# Cast the object columns Arrow cannot serialize (mixed types, dicts, lists) to
+# str for AgGrid. Columns that already hold only strings are left as they are,
+# and a frame with nothing to cast is returned without copying. infer_dtype
+# scans the column in C, so the probe costs far less than the cast it avoids.
+def _arrow_safe_object_columns(df):
+    cast_cols = [
+        col for col in df.select_dtypes(include='object').columns
+        if pd.api.types.infer_dtype(df[col], skipna=False) != 'string'
+    ]
+    if not cast_cols:
+        return df
+    return df.astype(dict.fromkeys(cast_cols, str))
+
+# AgGrid config of the per-period result columns (test_count_X, success_rate_X,
+# avg_return_X where X is a number), keyed by column prefix
+_DYNAMIC_COLUMN_PATTERN = re.compile(r'^(test_count|success_rate|avg_return)_\d+$')
+_DYNAMIC_COLUMN_CONFIG = {
+    'test_count': dict(width=85),  # 10-14 chars: "test_count_XX"
+    'success_rate': dict(type=['numericColumn', 'numberColumnFilter'], precision=2, width=110),  # 14-18 chars: "success_rate_XXX"
+    'avg_return': dict(type=['numericColumn', 'numberColumnFilter'], precision=2, width=100),  # 12-16 chars: "avg_return_XXX"
+}
+
+# Grid, axis line and tick styling shared by the MC resonance chart axes
+_CHART_AXIS_STYLE = dict(
+    showgrid=True,
+    gridwidth=1,
+    gridcolor='lightgray',
+    showline=True,
+    linewidth=1,
+    linecolor='black',
+    tickfont=dict(color='black'),
+)
+
+# Add the returns line (row 1) and average volume bars (row 2) shared by the
+# boxplot and avg_return_* fallback paths of the resonance chart.
+def _add_returns_volume_traces(traces, rows, periods_arr, returns_arr, volume_periods_arr, volumes_arr,
+                               name, line_color='lightgray', showlegend=True):
+    if len(periods_arr) > 1:
+        traces.append(dict(
+            type='scatter',
+            x=periods_arr,
+            y=returns_arr,
+            mode='lines+markers',
+            line=dict(color=line_color, width=1),
+            marker=dict(color='gray', size=6),
+            name=name,
+            showlegend=showlegend
+        ))
+        rows.append(1)
+
+    if len(volumes_arr) > 0:
+        traces.append(dict(
+            type='bar',
+            x=volume_periods_arr,
+            y=volumes_arr,
+            width=0.8,  # Fixed width on the integer period grid; skips auto-sizing
+            name='Average Volume',
+            marker=dict(color='lightgray', line=dict(width=0)),
+            showlegend=False
+        ))
+        rows.append(2)
+
+# Build the per-interval resonance chart. Streamlit reruns the whole script on
+# every widget interaction, so unchanged (ticker, interval, data) combinations
+# are served from the resource cache instead of being rebuilt trace by trace.
+# Traces are built as plain dicts rather than go.* objects.
+@st.cache_resource(max_entries=256, hash_funcs={np.ndarray: lambda a: a.tobytes()})
+def _build_ticker_chart(ticker, interval, ticker_data_tuple, filtered_returns):
+    selected_ticker_data = pd.Series(dict(ticker_data_tuple))
+
+    # avg_return_1..avg_return_100 as one float array (NaN where missing)
+    periods = np.arange(1, 101)  # Full range from 1 to 100
+    avg_returns = pd.to_numeric(selected_ticker_data.reindex([f'avg_return_{p}' for p in periods]),
+                                errors='coerce').to_numpy(dtype=float)
+    valid_returns = ~np.isnan(avg_returns)
+
+    # Create figure with subplots: price on top, volume on bottom
+    fig = make_subplots(
+        rows=2, cols=1,
+        subplot_titles=('Price Movement', 'Volume'),
+        vertical_spacing=0.1,
+        row_heights=[0.7, 0.3]
+    )
+
+    # Traces are collected and added to the figure in one add_traces call
+    traces, rows = [], []
+
+    # Use returns distribution data for boxplot visualization
+    if filtered_returns is not None and not filtered_returns.empty:
+        # Get periods that have data
+        periods_with_data = sorted(filtered_returns['period'].unique())
+
+        # Add boxplots for each period
+        median_price_values = []
+        median_periods = []
+
+        # Add volume bars for each period
+        volume_periods = []
+        avg_volumes = []
+
+        for period in periods_with_data:
+            period_data = filtered_returns[filtered_returns['period'] == period]
+            period_returns = period_data['return'].values
+
+            if len(period_returns) > 0:
+                # Convert returns to relative price (baseline = 100)
+                relative_prices = 100 + period_returns
+
+                # Add price boxplot
+                traces.append(dict(
+                    type='box',
+                    y=relative_prices,
+                    x=[period] * len(relative_prices),
+                    name=f'Period {period}',
+                    boxpoints=False,  # Don't show individual points
+                    showlegend=False,
+                    marker=dict(color='lightgray'),
+                    line=dict(color='lightgray')
+                ))
+                rows.append(1)
+
+                # Store median for connecting line
+                median_price_values.append(100 + np.median(period_returns))
+                median_periods.append(period)
+
+            # Add volume data if available
+            if 'volume' in period_data.columns:
+                period_volumes = period_data['volume'].values
+                if len(period_volumes) > 0:
+                    avg_volume = np.nanmean(period_volumes.astype(float))  # Skips NaN volumes in one pass
+                    volume_periods.append(period)
+                    avg_volumes.append(avg_volume)
+
+        # Median price connection line and grey average volume bars
+        _add_returns_volume_traces(traces, rows, median_periods, median_price_values, volume_periods, avg_volumes,
+                                   name='Median Returns', line_color='gray', showlegend=False)
+    else:
+        # Fallback to scatter plot of the avg_return_*/avg_volume_* columns (periods 0..100)
+        periods_x = np.concatenate(([0], periods[valid_returns]))  # Start with (0, 100)
+        returns_y = np.concatenate(([100.0], 100 + avg_returns[valid_returns]))
+
+        volume_keys = [f'avg_volume_{p}' for p in periods]
+        has_volume = pd.Index(volume_keys).isin(selected_ticker_data.index)
+        volume_periods = periods[has_volume]
+        avg_volumes = selected_ticker_data.reindex(volume_keys).to_numpy()[has_volume]
+
+        _add_returns_volume_traces(traces, rows, periods_x, returns_y, volume_periods, avg_volumes,
+                                   name=f"{ticker} ({interval})")
+
+    # Add actual price history if available
+    if 'price_history' in selected_ticker_data and selected_ticker_data['price_history']:
+        price_history = selected_ticker_data['price_history']
+        if isinstance(price_history, str):
+            # Handle case where price_history might be stored as string
+            try:
+                price_history = ast.literal_eval(str(price_history))
+            except Exception:
+                # If parsing fails, silently set to empty dict to avoid spam
+                price_history = {}
+
+        if price_history and 0 in price_history and price_history[0] is not None:
+            entry_price = float(price_history[0])
+
+            # Collect price history points relative to the entry price
+            history = pd.to_numeric(pd.Series(price_history, dtype=object), errors='coerce').dropna()
+            history = history[history.index >= 0].sort_index()
+            price_periods = history.index.to_numpy()
+            price_values = (history.to_numpy(dtype=float) / entry_price) * 100
+
+            # Add price history line and dots
+            if len(price_periods) > 1:
+                traces.append(dict(
+                    type='scatter',
+                    x=price_periods,
+                    y=price_values,
+                    mode='lines+markers',
+                    line=dict(color='red', width=1),
+                    marker=dict(color='red', size=6),
+                    name='Price History',
+                    showlegend=True
+                ))
+                rows.append(1)
+            elif len(price_periods) == 1:
+                # Single point case
+                traces.append(dict(
+                    type='scatter',
+                    x=price_periods,
+                    y=price_values,
+                    mode='markers',
+                    marker=dict(color='red', size=6),
+                    name='Price History',
+                    showlegend=True
+                ))
+                rows.append(1)
+
+    # Add actual volume history if available
+    if 'volume_history' in selected_ticker_data and selected_ticker_data['volume_history']:
+        volume_history = selected_ticker_data['volume_history']
+        if isinstance(volume_history, str):
+            try:
+                volume_history = ast.literal_eval(str(volume_history))
+            except Exception:
+                # If parsing fails, silently set to empty dict to avoid spam
+                volume_history = {}
+
+        if volume_history and 0 in volume_history and volume_history[0] is not None:
+            # Collect volume history points as NumPy arrays
+            history = pd.to_numeric(pd.Series(volume_history, dtype=object), errors='coerce').dropna()
+            history = history[history.index >= 0].sort_index()
+            volume_periods = history.index.to_numpy()
+            volume_values = history.to_numpy(dtype=float)
+
+            # Add volume history line (red lines for latest signal)
+            if len(volume_periods) > 1:
+                traces.append(dict(
+                    type='scatter',
+                    x=volume_periods,
+                    y=volume_values,
+                    mode='lines+markers',
+                    line=dict(color='red', width=2),
+                    marker=dict(color='red', size=6),
+                    name='Latest Signal Volume',
+                    showlegend=True
+                ))
+                rows.append(2)
+            elif len(volume_periods) == 1:
+                # Single point case
+                traces.append(dict(
+                    type='scatter',
+                    x=volume_periods,
+                    y=volume_values,
+                    mode='markers',
+                    marker=dict(color='red', size=6),
+                    name='Latest Signal Volume',
+                    showlegend=True
+                ))
+                rows.append(2)
+
+    # # Add gray dot at [0, 100] and connect to first data point
+    # fig.add_trace(go.Scatter(
+    #     x=[0],
+    #     y=[100],
+    #     mode='markers',
+    #     marker=dict(color='gray', size=8),
+    #     name='Entry Point',
+    #     showlegend=True
+    # ), row=1, col=1)
+
+    # Add gray line from [0, 100] to first available data point
+    # Find the first period with data (usually period 3)
+    first_period = None
+    first_value = None
+
+    # Use continuous range for consistent visualization
+    # Skip boxplot data check and use scatter plot data
+    if False:  # Disable boxplot data check to force continuous range
+        if filtered_returns is not None and not filtered_returns.empty:
+            periods_with_data = sorted(filtered_returns['period'].unique())
+            if periods_with_data:
+                first_period = periods_with_data[0]
+                period_returns = filtered_returns[filtered_returns['period'] == first_period]['return'].values
+                if len(period_returns) > 0:
+                    first_value = 100 + np.median(period_returns)
+
+    # If no boxplot data, use scatter plot data
+    if (first_period is None or first_value is None) and valid_returns.any():
+        first_index = np.argmax(valid_returns)
+        first_period = int(periods[first_index])
+        first_value = 100 + avg_returns[first_index]
+
+    # Add connecting line if we found a first data point
+    if first_period is not None and first_value is not None:
+        traces.append(dict(
+            type='scatter',
+            x=[0, first_period],
+            y=[100, first_value],
+            mode='lines',
+            line=dict(color='gray', width=1),
+            name='Baseline Connection',
+            showlegend=False
+        ))
+        rows.append(1)
+
+    fig.add_traces(traces, rows=rows, cols=[1] * len(traces))
+
+    # Add baseline reference line at y=100 (add after all traces for visibility)
+    fig.add_hline(y=100, line_dash="dash", line_color="gray", line_width=1, 
+                 annotation_text="Entry Price (Baseline)", annotation_position="top right", row=1, col=1)
+
+    # Highlight best period
+    max_return = -float('inf')
+    best_period = None
+    if valid_returns.any():
+        best_index = np.nanargmax(avg_returns)
+        best_period = int(periods[best_index])
+        max_return = avg_returns[best_index]
+
+    title_html = (
+        f"<span style='font-size:16px'><b>{ticker} ({interval})</b></span><br>"
+    )
+    if best_period is not None:
+         title_html += (f"<span style='font-size:10px'>best period: {best_period} | "
+        f"return: {max_return:.2f}% | "
+        f"success: {selected_ticker_data.get(f'success_rate_{best_period}', 0):.2f}  "
+        f"test count: {selected_ticker_data.get(f'test_count_{best_period}', 0)}</span>")
+
+    fig.update_layout(
+        title=dict(text=title_html, 
+                    x=0.5, 
+                    font=dict(color='black'),
+                    xanchor='center',
+                    yanchor='top'),
+        showlegend=False,
+        height=400,  # Increased height for dual subplots
+        plot_bgcolor='white',
+        paper_bgcolor='white'
+    )
+
+    # Update axes for subplots with synchronized x-axis
+    fig.update_xaxes(
+        title_text="Period", 
+        row=1, col=1,
+        range=[-5, 105],  # Set consistent x-axis range
+        showgrid=True,
+        gridwidth=1,
+        gridcolor='lightgray',
+        showline=True,
+        linewidth=1,
+        linecolor='black',
+        tickfont=dict(color='black'),
+        title=dict(text="Period", font=dict(color='black'))
+    )
+    fig.update_xaxes(
+        title_text="Period", 
+        row=2, col=1,
+        range=[-5, 105],  # Same x-axis range as top subplot
+        showgrid=True,
+        gridwidth=1,
+        gridcolor='lightgray',
+        showline=True,
+        linewidth=1,
+        linecolor='black',
+        tickfont=dict(color='black'),
+        title=dict(text="Period", font=dict(color='black'))
+    )
+    fig.update_yaxes(
+        title_text="Relative Price (Baseline = 100)", 
+        row=1, col=1,
+        showgrid=True,
+        gridwidth=1,
+        gridcolor='lightgray',
+        showline=True,
+        linewidth=1,
+        linecolor='black',
+        tickfont=dict(color='black'),
+        title=dict(text="Relative Price (Baseline = 100)", font=dict(color='black'))
+    )
+    fig.update_yaxes(
+        title_text="Volume", 
+        row=2, col=1,
+        showgrid=True,
+        gridwidth=1,
+        gridcolor='lightgray',
+        showline=True,
+        linewidth=1,
+        linecolor='black',
+        tickfont=dict(color='black'),
+        title=dict(text="Volume", font=dict(color='black'))
+    )
+
+    return fig
+
+# Build the per-interval MC resonance chart. Like the CD chart, unchanged
+# (ticker, interval, data) combinations are served from the resource cache, so
+# reruns triggered by unrelated widgets skip the trace construction entirely.
+@st.cache_resource(max_entries=256, hash_funcs={np.ndarray: lambda a: a.tobytes()})
+def _build_mc_ticker_chart(ticker, interval, ticker_data_tuple, filtered_returns):
+    selected_ticker_data = pd.Series(dict(ticker_data_tuple))
+
+    # avg_return_1..avg_return_100 as one float array (NaN where missing)
+    periods = np.arange(1, 101)  # Full range from 1 to 100
+    avg_returns = pd.to_numeric(selected_ticker_data.reindex([f'avg_return_{p}' for p in periods]),
+                                errors='coerce').to_numpy(dtype=float)
+    valid_returns = ~np.isnan(avg_returns)
+    volume_keys = [f'avg_volume_{p}' for p in periods]
+    has_volume = pd.Index(volume_keys).isin(selected_ticker_data.index)
+
+    # Create figure with subplots: price on top, volume on bottom
+    fig = make_subplots(
+        rows=2, cols=1,
+        subplot_titles=('Price Movement After MC Signal', 'Volume'),
+        vertical_spacing=0.1,
+        row_heights=[0.7, 0.3]
+    )
+
+    # Defer plotly's per-call validation and coalesce the trace and layout
+    # updates into one pass
+    with fig.batch_update():
+        # Use returns distribution data for boxplot visualization
+        if filtered_returns is not None and not filtered_returns.empty:
+            # Per-period medians and mean volumes in one grouped aggregation; the mean
+            # skips NaN volumes without building a separate mask
+            aggregations = {'return': 'median'}
+            if 'volume' in filtered_returns.columns:
+                aggregations['volume'] = 'mean'
+            period_stats = filtered_returns.groupby('period', sort=True).agg(aggregations)
+            median_periods = period_stats.index.to_numpy()
+            median_price_values = 100 + period_stats['return'].to_numpy()
+
+            # Add volume bars for each period
+            if 'volume' in period_stats.columns:
+                volume_periods = median_periods
+                avg_volumes = period_stats['volume'].to_numpy()
+            else:
+                volume_periods = []
+                avg_volumes = []
+
+            # Add price boxplots: relative prices (baseline = 100) of every period,
+            # drawn as one Box trace grouped by x
+            fig.add_trace(go.Box(
+                y=100 + filtered_returns['return'].to_numpy(),
+                x=filtered_returns['period'].to_numpy(),
+                name='Returns',
+                boxpoints=False,  # Don't show individual points
+                showlegend=False,
+                marker=dict(color='lightgray'),
+                line=dict(color='lightgray')
+            ), row=1, col=1)
+
+            # Add median price connection line
+            if len(median_price_values) > 1:
+                fig.add_trace(go.Scattergl(
+                    x=median_periods,
+                    y=median_price_values,
+                    mode='lines+markers',
+                    line=dict(color='gray', width=1),
+                    marker=dict(color='gray', size=6),
+                    name='Median Returns',
+                    showlegend=False
+                ), row=1, col=1)
+
+            # Add volume bars (grey bars for average volumes)
+            if len(avg_volumes) > 0:
+                fig.add_trace(go.Bar(
+                    x=volume_periods,
+                    y=avg_volumes,
+                    name='Average Volume',
+                    marker_color='lightgray',
+                    showlegend=False
+                ), row=2, col=1)
+        else:
+            # Fallback to scatter plot if no returns distribution data
+            periods_x = np.concatenate(([0], periods[valid_returns]))  # Start with (0, 100)
+            returns_y = np.concatenate(([100.0], 100 + avg_returns[valid_returns]))
+
+            if len(periods_x) > 1:
+                fig.add_trace(go.Scattergl(
+                    x=periods_x,
+                    y=returns_y,
+                    mode='lines+markers',
+                    line=dict(color='lightgray', width=1),
+                    marker=dict(color='gray', size=6),
+                    name=f"{ticker} ({interval})",
+                ), row=1, col=1)
+
+            # Add volume bars
+            volume_periods = periods[has_volume]
+            avg_volumes = selected_ticker_data.reindex(volume_keys).to_numpy()[has_volume]
+
+            if len(avg_volumes) > 0:
+                fig.add_trace(go.Bar(
+                    x=volume_periods,
+                    y=avg_volumes,
+                    name='Average Volume',
+                    marker_color='lightgray',
+                    showlegend=False
+                ), row=2, col=1)
+
+        # Add actual price history if available. The row lookup already parsed it, so
+        # this is a dict (empty when missing or unparsable) and needs no string check
+        price_history = _parse_history(selected_ticker_data.get('price_history'))
+        if price_history.get(0) is not None:
+            entry_price = float(price_history[0])
+
+            # Collect price history points relative to the entry price
+            history = pd.to_numeric(pd.Series(price_history, dtype=object), errors='coerce').dropna()
+            history = history[history.index >= 0].sort_index()
+            price_periods = history.index.to_numpy()
+            price_values = (history.to_numpy(dtype=float) / entry_price) * 100
+
+            # Add price history line and dots (a single point is drawn as a marker only)
+            if len(price_periods) > 0:
+                fig.add_trace(go.Scattergl(
+                    x=price_periods,
+                    y=price_values,
+                    mode='lines+markers' if len(price_periods) > 1 else 'markers',
+                    line=dict(color='red', width=1),
+                    marker=dict(color='red', size=6),
+                    name='Price History',
+                    showlegend=True
+                ), row=1, col=1)
+
+        # Add actual volume history if available
+        volume_history = _parse_history(selected_ticker_data.get('volume_history'))
+        if volume_history.get(0) is not None:
+            # Collect volume history points
+            history = pd.to_numeric(pd.Series(volume_history, dtype=object), errors='coerce').dropna()
+            history = history[history.index >= 0].sort_index()
+            volume_periods = history.index.to_numpy()
+            volume_values = history.to_numpy(dtype=float)
+
+            # Add volume history line (red lines for latest signal)
+            if len(volume_periods) > 0:
+                fig.add_trace(go.Scattergl(
+                    x=volume_periods,
+                    y=volume_values,
+                    mode='lines+markers' if len(volume_periods) > 1 else 'markers',
+                    line=dict(color='red', width=2),
+                    marker=dict(color='red', size=6),
+                    name='Latest Signal Volume',
+                    showlegend=True
+                ), row=2, col=1)
+
+        # Add baseline reference line at y=100 (add after all traces for visibility)
+        fig.add_hline(y=100, line_dash="dash", line_color="gray", line_width=1, 
+                     annotation_text="Short Price (Baseline)", annotation_position="top right", row=1, col=1)
+
+        # Find the first period with data (usually period 3). The scatter data is used
+        # rather than the boxplot data to keep the range continuous
+        first_period = None
+        first_value = None
+        if valid_returns.any():
+            first_index = np.argmax(valid_returns)
+            first_period = int(periods[first_index])
+            first_value = 100 + avg_returns[first_index]
+
+        # Add connecting line if we found a first data point
+        if first_period is not None and first_value is not None:
+            fig.add_trace(go.Scatter(
+                x=[0, first_period],
+                y=[100, first_value],
+                mode='lines',
+                line=dict(color='gray', width=1),
+                name='Baseline Connection',
+                showlegend=False
+            ), row=1, col=1)
+
+        # Highlight best period (for MC signals, best means most negative return)
+        min_return = float('inf')
+        best_period = None
+        if valid_returns.any():
+            best_index = np.nanargmin(avg_returns)
+            best_period = int(periods[best_index])
+            min_return = avg_returns[best_index]
+
+        title_html = (
+            f"<span style='font-size:16px'><b>{ticker} ({interval})</b></span><br>"
+        )
+        if best_period is not None:
+             title_html += (f"<span style='font-size:10px'>best period: {best_period} | "
+            f"return: {min_return:.2f}% | "
+            f"success: {selected_ticker_data.get(f'success_rate_{best_period}', 0):.2f}  "
+            f"test count: {selected_ticker_data.get(f'test_count_{best_period}', 0)}</span>")
+
+        fig.update_layout(
+            title=dict(text=title_html, 
+                        x=0.5, 
+                        font=dict(color='black'),
+                        xanchor='center',
+                        yanchor='top'),
+            showlegend=False,
+            height=400,  # Increased height for dual subplots
+            plot_bgcolor='white',
+            paper_bgcolor='white',
+            # Axes for both subplots in the same pass, with a synchronized x-axis range
+            xaxis=dict(range=[-5, 105], title=dict(text="Period", font=dict(color='black')), **_CHART_AXIS_STYLE),
+            xaxis2=dict(range=[-5, 105], title=dict(text="Period", font=dict(color='black')), **_CHART_AXIS_STYLE),
+            yaxis=dict(title=dict(text="Relative Price (Baseline = 100)", font=dict(color='black')), **_CHART_AXIS_STYLE),
+            yaxis2=dict(title=dict(text="Volume", font=dict(color='black')), **_CHART_AXIS_STYLE)
+        )
+
+    return fig
+
 # ============================
 # CD ANALYSIS PAGE
 # ============================
@@ -730,7 +1466,7 @@ if page == "CD Analysis (抄底)":
                                 if 'volume' in period_data.columns:
                                     period_volumes = period_data['volume'].values
                                     if len(period_volumes) > 0:
-                                        avg_volume = np.mean(period_volumes[~np.isnan(period_volumes)])
+                                        avg_volume = np.nanmean(period_volumes.astype(float))  # Skips NaN volumes in one pass
                                         volume_periods.append(period)
                                         avg_volumes.append(avg_volume)
                             
@@ -838,7 +1574,6 @@ if page == "CD Analysis (抄底)":
                         if isinstance(price_history, str):
                             # Handle case where price_history might be stored as string
                             try:
-                                import ast
                                 price_history = ast.literal_eval(str(price_history))
                             except Exception:
                                 # If parsing fails, silently set to empty dict to avoid spam
@@ -891,7 +1626,6 @@ if page == "CD Analysis (抄底)":
                         volume_history = selected_ticker['volume_history']
                         if isinstance(volume_history, str):
                             try:
-                                import ast
                                 volume_history = ast.literal_eval(str(volume_history))
                             except Exception:
                                 # If parsing fails, silently set to empty dict to avoid spam
@@ -941,7 +1675,6 @@ if page == "CD Analysis (抄底)":
                         # Parse price_history if it's a string
                         if isinstance(price_history, str):
                             try:
-                                import ast
                                 price_history = ast.literal_eval(str(price_history))
                             except:
                                 price_history = {}
@@ -1407,18 +2140,11 @@ if page == "CD Analysis (抄底)":
 
             # Display 1234 breakout candidates
             with tab_1234_candidates:
-                df, message = load_results('cd_breakout_candidates_summary_1234_', selected_file, 'date')
+                # Truncated to most recent 60 days
+                df, message = load_recent_results('cd_breakout_candidates_summary_1234_', selected_file, 'date',
+                                                  days=60, bool_cols=('nx_30m_signal',))
                 
                 if df is not None and '1234' in message:
-                    # Truncate to most recent 60 days
-                    if 'date' in df.columns:
-                        df['date'] = pd.to_datetime(df['date'])
-                        cutoff_date = pd.Timestamp.now() - pd.Timedelta(days=60)
-                        df = df[df['date'] >= cutoff_date]
-                        if 'nx_30m_signal' in df.columns:
-                            df['nx_30m_signal'] = df['nx_30m_signal'].astype(bool)
-                        df['date'] = df['date'].dt.strftime('%Y-%m-%d')
-                    
                     if resonance_ticker_filter:
                         df = df[df['ticker'].str.contains(resonance_ticker_filter, case=False)]
                     
@@ -1459,16 +2185,10 @@ if page == "CD Analysis (抄底)":
 
             # Display 1234 detailed results
             with tab_1234_details:
-                df, message = load_results('cd_breakout_candidates_details_1234_', selected_file, 'signal_date')
+                # Truncated to most recent 60 days
+                df, message = load_recent_results('cd_breakout_candidates_details_1234_', selected_file, 'signal_date', days=60)
                 
                 if df is not None and '1234' in message:
-                    # Truncate to most recent 60 days
-                    if 'signal_date' in df.columns:
-                        df['signal_date'] = pd.to_datetime(df['signal_date'])
-                        cutoff_date = pd.Timestamp.now() - pd.Timedelta(days=60)
-                        df = df[df['signal_date'] >= cutoff_date]
-                        df['signal_date'] = df['signal_date'].dt.strftime('%Y-%m-%d')
-
                     if resonance_ticker_filter:
                         df = df[df['ticker'].str.contains(resonance_ticker_filter, case=False)]
                     
@@ -1597,396 +2317,21 @@ if page == "CD Analysis (抄底)":
                             
                             selected_ticker_data = plot_data.iloc[0]
 
-                            # Create figure with subplots: price on top, volume on bottom
-                            fig = make_subplots(
-                                rows=2, cols=1,
-                                subplot_titles=('Price Movement', 'Volume'),
-                                vertical_spacing=0.1,
-                                row_heights=[0.7, 0.3]
-                            )
-                            
-                            # Initialize variables for tracking last price point
-                            last_price_period = None
-                            last_price_value = None
-                            
-                            # Filter returns distribution data for boxplot visualization
+                            # Filter returns distribution data for this ticker and interval
+                            filtered_returns = None
                             if returns_df is not None and not returns_df.empty:
                                 filtered_returns = returns_df[
                                     (returns_df['ticker'] == ticker) &
                                     (returns_df['interval'] == interval)
                                 ]
-                                
-                                if not filtered_returns.empty:
-                                    # Get periods that have data
-                                    periods_with_data = sorted(filtered_returns['period'].unique())
-                                    
-                                    # Add boxplots for each period
-                                    median_price_values = []
-                                    median_periods = []
-                                    
-                                    # Add volume bars for each period
-                                    volume_periods = []
-                                    avg_volumes = []
-                                    
-                                    for period in periods_with_data:
-                                        period_data = filtered_returns[filtered_returns['period'] == period]
-                                        period_returns = period_data['return'].values
-                                        
-                                        if len(period_returns) > 0:
-                                            # Convert returns to relative price (baseline = 100)
-                                            relative_prices = 100 + period_returns
-                                            
-                                            # Add price boxplot
-                                            fig.add_trace(go.Box(
-                                                y=relative_prices,
-                                                x=[period] * len(relative_prices),
-                                                name=f'Period {period}',
-                                                boxpoints=False,  # Don't show individual points
-                                                showlegend=False,
-                                                marker=dict(color='lightgray'),
-                                                line=dict(color='lightgray')
-                                            ))
-                                            
-                                            # Store median for connecting line
-                                            median_price_values.append(100 + np.median(period_returns))
-                                            median_periods.append(period)
-                                        
-                                        # Add volume data if available
-                                        if 'volume' in period_data.columns:
-                                            period_volumes = period_data['volume'].values
-                                            if len(period_volumes) > 0:
-                                                avg_volume = np.mean(period_volumes[~np.isnan(period_volumes)])
-                                                volume_periods.append(period)
-                                                avg_volumes.append(avg_volume)
-                                    
-                                    # Add median price connection line
-                                    if len(median_price_values) > 1:
-                                        fig.add_trace(go.Scatter(
-                                            x=median_periods,
-                                            y=median_price_values,
-                                            mode='lines+markers',
-                                            line=dict(color='gray', width=1),
-                                            marker=dict(color='gray', size=6),
-                                            name='Median Returns',
-                                            showlegend=False
-                                        ), row=1, col=1)
-                                    
-                                    # Add volume bars (grey bars for average volumes)
-                                    if len(avg_volumes) > 0:
-                                        fig.add_trace(go.Bar(
-                                            x=volume_periods,
-                                            y=avg_volumes,
-                                            name='Average Volume',
-                                            marker_color='lightgray',
-                                            showlegend=False
-                                        ), row=2, col=1)
-                                else:
-                                    # Fallback to scatter plot
-                                    periods = [0] + list(range(1, 101))  # Full range from 0 to 100
-                                    stock_returns = [(0, 100)]  # Start with (0, 100)
-                                    for period in periods[1:]:  # Skip 0 as we already added it
-                                        if f'avg_return_{period}' in selected_ticker_data and pd.notna(selected_ticker_data[f'avg_return_{period}']):
-                                            stock_returns.append((period, 100 + selected_ticker_data[f'avg_return_{period}']))
-                                    
-                                    if len(stock_returns) > 1:
-                                        periods_x, returns_y = zip(*stock_returns)
-                                        fig.add_trace(go.Scatter(
-                                            x=periods_x,
-                                            y=returns_y,
-                                            mode='lines+markers',
-                                            line=dict(color='lightgray', width=1),
-                                            marker=dict(color='gray', size=6),
-                                            name=f"{ticker} ({interval})",
-                                        ), row=1, col=1)
-                                    
-                                    # Add volume bars for fallback case
-                                    volume_periods = []
-                                    avg_volumes = []
-                                    for period in periods[1:]:
-                                        if f'avg_volume_{period}' in selected_ticker_data:
-                                            volume_periods.append(period)
-                                            avg_volumes.append(selected_ticker_data[f'avg_volume_{period}'])
-                                    
-                                    if len(avg_volumes) > 0:
-                                        fig.add_trace(go.Bar(
-                                            x=volume_periods,
-                                            y=avg_volumes,
-                                            name='Average Volume',
-                                            marker_color='lightgray',
-                                            showlegend=False
-                                        ), row=2, col=1)
-                            else:
-                                # Fallback to scatter plot if no returns distribution data
-                                periods = [0] + list(range(1, 101))  # Full range from 0 to 100
-                                stock_returns = [(0, 100)]
-                                for period in periods[1:]:
-                                    if f'avg_return_{period}' in selected_ticker_data and pd.notna(selected_ticker_data[f'avg_return_{period}']):
-                                        stock_returns.append((period, 100 + selected_ticker_data[f'avg_return_{period}']))
-                                
-                                if len(stock_returns) > 1:
-                                    periods_x, returns_y = zip(*stock_returns)
-                                    fig.add_trace(go.Scatter(
-                                        x=periods_x,
-                                        y=returns_y,
-                                        mode='lines+markers',
-                                        line=dict(color='lightgray', width=1),
-                                        marker=dict(color='gray', size=6),
-                                        name=f"{ticker} ({interval})",
-                                    ), row=1, col=1)
-                                
-                                # Add volume bars
-                                volume_periods = []
-                                avg_volumes = []
-                                for period in periods[1:]:
-                                    if f'avg_volume_{period}' in selected_ticker_data:
-                                        volume_periods.append(period)
-                                        avg_volumes.append(selected_ticker_data[f'avg_volume_{period}'])
-                                
-                                if len(avg_volumes) > 0:
-                                    fig.add_trace(go.Bar(
-                                        x=volume_periods,
-                                        y=avg_volumes,
-                                        name='Average Volume',
-                                        marker_color='lightgray',
-                                        showlegend=False
-                                    ), row=2, col=1)
-                            
-                            # Add actual price history if available
-                            if 'price_history' in selected_ticker_data and selected_ticker_data['price_history']:
-                                price_history = selected_ticker_data['price_history']
-                                if isinstance(price_history, str):
-                                    # Handle case where price_history might be stored as string
-                                    try:
-                                        import ast
-                                        price_history = ast.literal_eval(str(price_history))
-                                    except Exception:
-                                        # If parsing fails, silently set to empty dict to avoid spam
-                                        price_history = {}
-                                
-                                if price_history and 0 in price_history and price_history[0] is not None:
-                                    entry_price = float(price_history[0])
-                                    price_periods = []
-                                    price_values = []
-                                    
-                                    # Collect price history points
-                                    for period in sorted(price_history.keys()):
-                                        if price_history[period] is not None and period >= 0:
-                                            try:
-                                                relative_price = (float(price_history[period]) / entry_price) * 100
-                                                price_periods.append(period)
-                                                price_values.append(relative_price)
-                                            except (ValueError, TypeError):
-                                                continue
-                                    
-                                    # Add price history line and dots
-                                    if len(price_periods) > 1:
-                                        fig.add_trace(go.Scatter(
-                                            x=price_periods,
-                                            y=price_values,
-                                            mode='lines+markers',
-                                            line=dict(color='red', width=1),
-                                            marker=dict(color='red', size=6),
-                                            name='Price History',
-                                            showlegend=True
-                                        ), row=1, col=1)
-                                    elif len(price_periods) == 1:
-                                        # Single point case
-                                        fig.add_trace(go.Scatter(
-                                            x=price_periods,
-                                            y=price_values,
-                                            mode='markers',
-                                            marker=dict(color='red', size=6),
-                                            name='Price History',
-                                            showlegend=True
-                                        ), row=1, col=1)
-                                    
-                                    # Store the last price history point for connecting to current price
-                                    if price_periods:
-                                        last_price_period = price_periods[-1]
-                                        last_price_value = price_values[-1]
-                            
-                            # Add actual volume history if available
-                            if 'volume_history' in selected_ticker_data and selected_ticker_data['volume_history']:
-                                volume_history = selected_ticker_data['volume_history']
-                                if isinstance(volume_history, str):
-                                    try:
-                                        import ast
-                                        volume_history = ast.literal_eval(str(volume_history))
-                                    except Exception:
-                                        # If parsing fails, silently set to empty dict to avoid spam
-                                        volume_history = {}
-                                
-                                if volume_history and 0 in volume_history and volume_history[0] is not None:
-                                    volume_periods = []
-                                    volume_values = []
-                                    
-                                    # Collect volume history points
-                                    for period in sorted(volume_history.keys()):
-                                        if volume_history[period] is not None and period >= 0:
-                                            try:
-                                                volume_periods.append(period)
-                                                volume_values.append(float(volume_history[period]))
-                                            except (ValueError, TypeError):
-                                                continue
-                                    
-                                    # Add volume history line (red lines for latest signal)
-                                    if len(volume_periods) > 1:
-                                        fig.add_trace(go.Scatter(
-                                            x=volume_periods,
-                                            y=volume_values,
-                                            mode='lines+markers',
-                                            line=dict(color='red', width=2),
-                                            marker=dict(color='red', size=6),
-                                            name='Latest Signal Volume',
-                                            showlegend=True
-                                        ), row=2, col=1)
-                                    elif len(volume_periods) == 1:
-                                        # Single point case
-                                        fig.add_trace(go.Scatter(
-                                            x=volume_periods,
-                                            y=volume_values,
-                                            mode='markers',
-                                            marker=dict(color='red', size=6),
-                                            name='Latest Signal Volume',
-                                            showlegend=True
-                                        ), row=2, col=1)
-                        
-                            # Add baseline reference line at y=100 (add after all traces for visibility)
-                            fig.add_hline(y=100, line_dash="dash", line_color="gray", line_width=1, 
-                                         annotation_text="Entry Price (Baseline)", annotation_position="top right", row=1, col=1)
-                            
-                            # # Add gray dot at [0, 100] and connect to first data point
-                            # fig.add_trace(go.Scatter(
-                            #     x=[0],
-                            #     y=[100],
-                            #     mode='markers',
-                            #     marker=dict(color='gray', size=8),
-                            #     name='Entry Point',
-                            #     showlegend=True
-                            # ), row=1, col=1)
-                            
-                            # Add gray line from [0, 100] to first available data point
-                            # Find the first period with data (usually period 3)
-                            first_period = None
-                            first_value = None
-                            
-                            # Use continuous range for consistent visualization
-                            # Skip boxplot data check and use scatter plot data
-                            if False:  # Disable boxplot data check to force continuous range
-                                filtered_returns = returns_df[
-                                    (returns_df['ticker'] == ticker) &
-                                    (returns_df['interval'] == interval)
-                                ]
-                                if not filtered_returns.empty:
-                                    periods_with_data = sorted(filtered_returns['period'].unique())
-                                    if periods_with_data:
-                                        first_period = periods_with_data[0]
-                                        period_returns = filtered_returns[filtered_returns['period'] == first_period]['return'].values
-                                        if len(period_returns) > 0:
-                                            first_value = 100 + np.median(period_returns)
-                            
-                            # If no boxplot data, use scatter plot data
-                            if first_period is None or first_value is None:
-                                periods = list(range(1, 101))  # Full range from 1 to 100
-                                for period in periods:
-                                    if f'avg_return_{period}' in selected_ticker_data and pd.notna(selected_ticker_data[f'avg_return_{period}']):
-                                        first_period = period
-                                        first_value = 100 + selected_ticker_data[f'avg_return_{period}']
-                                        break
-                            
-                            # Add connecting line if we found a first data point
-                            if first_period is not None and first_value is not None:
-                                fig.add_trace(go.Scatter(
-                                    x=[0, first_period],
-                                    y=[100, first_value],
-                                    mode='lines',
-                                    line=dict(color='gray', width=1),
-                                    name='Baseline Connection',
-                                    showlegend=False
-                                ), row=1, col=1)
-                            
-                            # Highlight best period
-                            max_return = -float('inf')
-                            best_period = None
-                            periods = list(range(1, 101))  # Full range from 1 to 100
-                            for period in periods:
-                                if f'avg_return_{period}' in selected_ticker_data and pd.notna(selected_ticker_data[f'avg_return_{period}']):
-                                    if selected_ticker_data[f'avg_return_{period}'] > max_return:
-                                        max_return = selected_ticker_data[f'avg_return_{period}']
-                                        best_period = period
-                            
-                            title_html = (
-                                f"<span style='font-size:16px'><b>{ticker} ({interval})</b></span><br>"
-                            )
-                            if best_period is not None:
-                                 title_html += (f"<span style='font-size:10px'>best period: {best_period} | "
-                                f"return: {max_return:.2f}% | "
-                                f"success: {selected_ticker_data.get(f'success_rate_{best_period}', 0):.2f}  "
-                                f"test count: {selected_ticker_data.get(f'test_count_{best_period}', 0)}</span>")
-                            
-                            fig.update_layout(
-                                title=dict(text=title_html, 
-                                            x=0.5, 
-                                            font=dict(color='black'),
-                                            xanchor='center',
-                                            yanchor='top'),
-                                showlegend=False,
-                                height=400,  # Increased height for dual subplots
-                                plot_bgcolor='white',
-                                paper_bgcolor='white'
-                            )
-                            
-                            # Update axes for subplots with synchronized x-axis
-                            fig.update_xaxes(
-                                title_text="Period", 
-                                row=1, col=1,
-                                range=[-5, 105],  # Set consistent x-axis range
-                                showgrid=True,
-                                gridwidth=1,
-                                gridcolor='lightgray',
-                                showline=True,
-                                linewidth=1,
-                                linecolor='black',
-                                tickfont=dict(color='black'),
-                                title=dict(text="Period", font=dict(color='black'))
-                            )
-                            fig.update_xaxes(
-                                title_text="Period", 
-                                row=2, col=1,
-                                range=[-5, 105],  # Same x-axis range as top subplot
-                                showgrid=True,
-                                gridwidth=1,
-                                gridcolor='lightgray',
-                                showline=True,
-                                linewidth=1,
-                                linecolor='black',
-                                tickfont=dict(color='black'),
-                                title=dict(text="Period", font=dict(color='black'))
-                            )
-                            fig.update_yaxes(
-                                title_text="Relative Price (Baseline = 100)", 
-                                row=1, col=1,
-                                showgrid=True,
-                                gridwidth=1,
-                                gridcolor='lightgray',
-                                showline=True,
-                                linewidth=1,
-                                linecolor='black',
-                                tickfont=dict(color='black'),
-                                title=dict(text="Relative Price (Baseline = 100)", font=dict(color='black'))
-                            )
-                            fig.update_yaxes(
-                                title_text="Volume", 
-                                row=2, col=1,
-                                showgrid=True,
-                                gridwidth=1,
-                                gridcolor='lightgray',
-                                showline=True,
-                                linewidth=1,
-                                linecolor='black',
-                                tickfont=dict(color='black'),
-                                title=dict(text="Volume", font=dict(color='black'))
-                            )
+
+                            # Skip the chart entirely when the ticker has no return data at all
+                            has_avg_returns = any(pd.notna(selected_ticker_data.get(f'avg_return_{p}')) for p in (3, 10, 30))
+                            if not has_avg_returns and (filtered_returns is None or filtered_returns.empty):
+                                st.info(f"No return data for {ticker} ({interval})")
+                                continue
+
+                            fig = _build_ticker_chart(ticker, interval, tuple(selected_ticker_data.items()), filtered_returns)
                             
                             st.plotly_chart(fig, use_container_width=True)
 
@@ -1999,107 +2344,114 @@ elif page == "MC Analysis (卖出)":
     if selected_file:
         st.subheader("Waikiki Model")
         
-        # Add shared ticker filter for Waikiki model
-        mc_waikiki_ticker_filter = st.text_input("Filter by ticker symbol:", key=f"mc_waikiki_ticker_filter_{selected_file}")
-
-        mc_waikiki_viz_col, mc_waikiki_tables_col = st.columns([1, 1])
-
-        with mc_waikiki_viz_col:
-            # Load the detailed results for period information
-            mc_detailed_df, _ = load_results('mc_eval_custom_detailed_', selected_file)
+        # Add shared ticker filter for Waikiki model; inside a form so the page only
+        # reruns when the filter is submitted, not when the input loses focus
+        with st.form(key=f"mc_waikiki_filter_form_{selected_file}", border=False):
+            mc_waikiki_ticker_filter = st.text_input("Filter by ticker symbol:", key=f"mc_waikiki_ticker_filter_{selected_file}")
+            st.form_submit_button("Filter")
+
+        # Waikiki chart for the ticker/interval selected in the tables (held in
+        # session state). Runs as a fragment so it can rerun on its own.
+        @st.fragment
+        def render_mc_waikiki_viz(selected_file):
+            # Use selected ticker and interval from session state for MC
+            mc_ticker_filter = st.session_state.mc_selected_ticker if st.session_state.mc_selected_ticker else ""
+            mc_selected_interval = st.session_state.mc_selected_interval if st.session_state.mc_selected_interval else '1d'
             
-            # Load the returns distribution data for boxplots
-            mc_returns_df, _ = load_results('mc_eval_returns_distribution_', selected_file)
+            # If no ticker is selected, automatically select the first one from the best intervals (50) data
+            if not mc_ticker_filter:
+                mc_best_50_df, _ = load_results('mc_eval_best_intervals_50_', selected_file, 'avg_return_10')
+                if mc_best_50_df is not None and not mc_best_50_df.empty:
+                    first_row = mc_best_50_df.iloc[0]
+                    mc_ticker_filter = first_row['ticker']
+                    mc_selected_interval = first_row['interval']
+                    # Update session state
+                    st.session_state.mc_selected_ticker = mc_ticker_filter
+                    st.session_state.mc_selected_interval = mc_selected_interval
+
+            # Load only the selected ticker/interval rows of the detailed results (period information)
+            mc_filtered_detailed = load_result_rows('mc_eval_custom_detailed_', selected_file, mc_ticker_filter, mc_selected_interval)
             
-            if mc_detailed_df is None or 'ticker' not in mc_detailed_df.columns:
+            if mc_filtered_detailed is None:
                 st.info("Please run an analysis first to view visualizations and period returns.")
             else:
-                # Use selected ticker and interval from session state for MC
-                mc_ticker_filter = st.session_state.mc_selected_ticker if st.session_state.mc_selected_ticker else ""
-                mc_selected_interval = st.session_state.mc_selected_interval if st.session_state.mc_selected_interval else '1d'
-                
-                # If no ticker is selected, automatically select the first one from the best intervals (50) data
-                if not mc_ticker_filter:
-                    mc_best_50_df, _ = load_results('mc_eval_best_intervals_50_', selected_file, 'avg_return_10')
-                    if mc_best_50_df is not None and not mc_best_50_df.empty:
-                        first_row = mc_best_50_df.iloc[0]
-                        mc_ticker_filter = first_row['ticker']
-                        mc_selected_interval = first_row['interval']
-                        # Update session state
-                        st.session_state.mc_selected_ticker = mc_ticker_filter
-                        st.session_state.mc_selected_interval = mc_selected_interval
-
-                # Filter the detailed DataFrame with exact match for ticker and interval
-                mc_filtered_detailed = mc_detailed_df[
-                    (mc_detailed_df['ticker'] == mc_ticker_filter) &
-                    (mc_detailed_df['interval'] == mc_selected_interval)
-                ]
-                
                 if not mc_filtered_detailed.empty:
                     mc_selected_ticker = mc_filtered_detailed.iloc[0]
 
-                    # Visualization Panel
-                    # Create figure with subplots: price on top, volume on bottom
-                    fig = make_subplots(
-                        rows=2, cols=1,
-                        subplot_titles=('Price Movement After MC Signal', 'Volume'),
-                        vertical_spacing=0.1,
-                        row_heights=[0.7, 0.3]
-                    )
-                    
-                    # Filter returns distribution data for selected ticker and interval
-                    if mc_returns_df is not None and not mc_returns_df.empty:
-                        mc_filtered_returns = mc_returns_df[
-                            (mc_returns_df['ticker'] == mc_ticker_filter) &
-                            (mc_returns_df['interval'] == mc_selected_interval)
-                        ]
+                    # Reuse the figure from the previous rerun while the selection and the
+                    # underlying result files are unchanged
+                    mc_fig_key = (selected_file, mc_ticker_filter, mc_selected_interval,
+                                  result_file_version('mc_eval_custom_detailed_', selected_file),
+                                  result_file_version('mc_eval_returns_distribution_', selected_file))
+                    if st.session_state.get('mc_waikiki_fig_key') == mc_fig_key:
+                        fig = st.session_state.mc_waikiki_fig
+                    else:
+                        # Per-period avg_return/avg_volume summary of the selected row, indexed by period
+                        mc_period_summary = load_period_summary('mc_eval_custom_detailed_', selected_file, mc_ticker_filter, mc_selected_interval)
+                        if mc_period_summary is None:
+                            mc_period_summary = pd.DataFrame(columns=['avg_return', 'avg_volume'], dtype=float)
+                        mc_avg_returns = mc_period_summary['avg_return'].dropna()
+                        mc_avg_volumes = mc_period_summary['avg_volume'].dropna()
+
+                        # Visualization Panel
+                        # Create figure with subplots: price on top, volume on bottom
+                        fig = make_subplots(
+                            rows=2, cols=1,
+                            subplot_titles=('Price Movement After MC Signal', 'Volume'),
+                            vertical_spacing=0.1,
+                            row_heights=[0.7, 0.3]
+                        )
+                    
+                        # Traces are collected and added to the figure in one add_traces call
+                        traces, rows = [], []
+                    
+                        # Load returns distribution rows for selected ticker and interval (boxplots)
+                        mc_filtered_returns = load_result_rows('mc_eval_returns_distribution_', selected_file, mc_ticker_filter, mc_selected_interval)
+                        if mc_filtered_returns is not None and not mc_filtered_returns.empty:
+                            # Per-period medians and nan-aware average volumes in one groupby pass
+                            period_groups = mc_filtered_returns.groupby('period', sort=True)
+                            median_returns = period_groups['return'].median()
+                            median_periods = median_returns.index.to_numpy()
+                            median_price_values = 100 + median_returns.to_numpy(dtype=np.float32)
+                        
+                            # Add price boxplots for all periods as a single trace. The box statistics
+                            # (quartiles and 1.5 IQR whiskers) are precomputed per period, so only five
+                            # numbers per period are sent to the browser instead of every raw return
+                            valid_returns = mc_filtered_returns.dropna(subset=['return'])
+                            relative_prices = 100 + valid_returns['return']  # Relative price (baseline = 100)
+                            return_periods = valid_returns['period']
+                            price_groups = relative_prices.groupby(return_periods, sort=True)
+                            q1 = price_groups.quantile(0.25)
+                            q3 = price_groups.quantile(0.75)
+                            iqr = q3 - q1
+                            in_fences = relative_prices.between(return_periods.map(q1 - 1.5 * iqr), return_periods.map(q3 + 1.5 * iqr))
+                            fenced_groups = relative_prices[in_fences].groupby(return_periods[in_fences], sort=True)
+                            traces.append(go.Box(
+                                x=q1.index.to_numpy(),
+                                q1=q1.to_numpy(dtype=np.float32),
+                                median=price_groups.median().to_numpy(dtype=np.float32),
+                                q3=q3.to_numpy(dtype=np.float32),
+                                lowerfence=fenced_groups.min().reindex(q1.index).to_numpy(dtype=np.float32),
+                                upperfence=fenced_groups.max().reindex(q1.index).to_numpy(dtype=np.float32),
+                                name='Returns Distribution',
+                                boxpoints=False,  # Don't show individual points
+                                showlegend=False,
+                                marker=dict(color='lightgray'),
+                                line=dict(color='lightgray')
+                            ))
+                            rows.append(1)
+                        
+                            if 'volume' in mc_filtered_returns.columns:
+                                period_volumes = period_groups['volume'].mean()
+                                volume_periods = period_volumes.index.to_numpy()
+                                avg_volumes = period_volumes.to_numpy(dtype=np.float32)
+                            else:
+                                volume_periods = []
+                                avg_volumes = []
                         
-                        if not mc_filtered_returns.empty:
-                            # Get periods that have data
-                            periods_with_data = sorted(mc_filtered_returns['period'].unique())
-                            
-                            # Add price boxplots for each period
-                            median_price_values = []
-                            median_periods = []
-                            
-                            # Add volume bars for each period
-                            volume_periods = []
-                            avg_volumes = []
-                            
-                            for period in periods_with_data:
-                                period_data = mc_filtered_returns[mc_filtered_returns['period'] == period]
-                                period_returns = period_data['return'].values
-                                
-                                if len(period_returns) > 0:
-                                    # Convert returns to relative price (baseline = 100)
-                                    relative_prices = 100 + period_returns
-                                    
-                                    # Add price boxplot
-                                    fig.add_trace(go.Box(
-                                        y=relative_prices,
-                                        x=[period] * len(relative_prices),
-                                        name=f'Period {period}',
-                                        boxpoints=False,  # Don't show individual points
-                                        showlegend=False,
-                                        marker=dict(color='lightgray'),
-                                        line=dict(color='lightgray')
-                                    ))
-                                    
-                                    # Store median for connecting line
-                                    median_price_values.append(100 + np.median(period_returns))
-                                    median_periods.append(period)
-                                
-                                # Add volume data if available
-                                if 'volume' in period_data.columns:
-                                    period_volumes = period_data['volume'].values
-                                    if len(period_volumes) > 0:
-                                        avg_volume = np.mean(period_volumes[~np.isnan(period_volumes)])
-                                        volume_periods.append(period)
-                                        avg_volumes.append(avg_volume)
-                            
                             # Add median price connection line
                             if len(median_price_values) > 1:
-                                fig.add_trace(go.Scatter(
+                                traces.append(go.Scatter(
                                     x=median_periods,
                                     y=median_price_values,
                                     mode='lines+markers',
@@ -2108,63 +2460,24 @@ elif page == "MC Analysis (卖出)":
                                     name='Median Returns',
                                     showlegend=True
                                 ))
-                            
+                                rows.append(1)
+                        
                             # Add volume bars (grey bars for average volumes)
                             if len(avg_volumes) > 0:
-                                fig.add_trace(go.Bar(
+                                traces.append(go.Bar(
                                     x=volume_periods,
                                     y=avg_volumes,
                                     name='Average Volume',
                                     marker_color='lightgray',
                                     showlegend=True
-                                ), row=2, col=1)
-                        else:
-                            # Fallback to original scatter plot if no returns distribution data
-                            periods = [0] + list(range(1, 101))  # Full range from 0 to 100
-                            stock_returns = [(0, 100)]  # Start with (0, 100)
-                            for period in periods[1:]:  # Skip 0 as we already added it
-                                if f'avg_return_{period}' in mc_selected_ticker:
-                                    stock_returns.append((period, 100 + mc_selected_ticker[f'avg_return_{period}']))
-                            
-                            if stock_returns:
-                                periods_x, returns_y = zip(*stock_returns)
-                                fig.add_trace(go.Scatter(
-                                    x=periods_x,
-                                    y=returns_y,
-                                    mode='lines+markers',
-                                    line=dict(color='lightgray', width=1),
-                                    marker=dict(color='gray', size=6),
-                                    name=f"{mc_selected_ticker['ticker']} ({mc_selected_ticker['interval']})",
-                                    showlegend=True
                                 ))
-                            
-                            # Add volume bars for fallback case
-                            volume_periods = []
-                            avg_volumes = []
-                            for period in periods[1:]:
-                                if f'avg_volume_{period}' in mc_selected_ticker:
-                                    volume_periods.append(period)
-                                    avg_volumes.append(mc_selected_ticker[f'avg_volume_{period}'])
-                            
-                            if len(avg_volumes) > 0:
-                                fig.add_trace(go.Bar(
-                                    x=volume_periods,
-                                    y=avg_volumes,
-                                    name='Average Volume',
-                                    marker_color='lightgray',
-                                    showlegend=True
-                                ), row=2, col=1)
-                    else:
-                        # Fallback to original scatter plot if no returns distribution data available
-                        periods = [0] + list(range(1, 101))  # Full range from 0 to 100
-                        stock_returns = [(0, 100)]  # Start with (0, 100)
-                        for period in periods[1:]:  # Skip 0 as we already added it
-                            if f'avg_return_{period}' in mc_selected_ticker:
-                                stock_returns.append((period, 100 + mc_selected_ticker[f'avg_return_{period}']))
-                        
-                        if stock_returns:
-                            periods_x, returns_y = zip(*stock_returns)
-                            fig.add_trace(go.Scatter(
+                                rows.append(2)
+                        else:
+                            # Fallback to original scatter plot if no returns distribution data available
+                            stock_returns = mc_avg_returns.loc[1:100]  # Full range from 1 to 100
+                            periods_x = np.concatenate(([0], stock_returns.index.to_numpy()))  # Start with (0, 100)
+                            returns_y = np.concatenate(([100.0], 100 + stock_returns.to_numpy())).astype(np.float32)
+                            traces.append(go.Scatter(
                                 x=periods_x,
                                 y=returns_y,
                                 mode='lines+markers',
@@ -2173,433 +2486,448 @@ elif page == "MC Analysis (卖出)":
                                 name=f"{mc_selected_ticker['ticker']} ({mc_selected_ticker['interval']})",
                                 showlegend=True
                             ))
+                            rows.append(1)
                         
-                        # Add volume bars
-                        volume_periods = []
-                        avg_volumes = []
-                        for period in periods[1:]:
-                            if f'avg_volume_{period}' in mc_selected_ticker:
-                                volume_periods.append(period)
-                                avg_volumes.append(mc_selected_ticker[f'avg_volume_{period}'])
+                            # Add volume bars
+                            stock_volumes = mc_avg_volumes.loc[1:100]
+                            volume_periods = stock_volumes.index.to_numpy()
+                            avg_volumes = stock_volumes.to_numpy(dtype=np.float32)
                         
-                        if len(avg_volumes) > 0:
-                            fig.add_trace(go.Bar(
-                                x=volume_periods,
-                                y=avg_volumes,
-                                name='Average Volume',
-                                marker_color='lightgray',
-                                showlegend=True
-                            ), row=2, col=1)
+                            if len(avg_volumes) > 0:
+                                traces.append(go.Bar(
+                                    x=volume_periods,
+                                    y=avg_volumes,
+                                    name='Average Volume',
+                                    marker_color='lightgray',
+                                    showlegend=True
+                                ))
+                                rows.append(2)
                     
-                    # Initialize variables for tracking last price point
-                    last_price_period = None
-                    last_price_value = None
+                        # Initialize variables for tracking last price point
+                        last_price_period = None
+                        last_price_value = None
                     
-                    # Add actual price history if available
-                    if 'price_history' in mc_selected_ticker and mc_selected_ticker['price_history']:
-                        price_history = mc_selected_ticker['price_history']
-                        if isinstance(price_history, str):
-                            # Handle case where price_history might be stored as string
-                            try:
-                                import ast
-                                price_history = ast.literal_eval(str(price_history))
-                            except Exception:
-                                # If parsing fails, silently set to empty dict to avoid spam
-                                price_history = {}
+                        # Add actual price history if available
+                        if 'price_history' in mc_selected_ticker and mc_selected_ticker['price_history']:
+                            price_history = mc_selected_ticker['price_history']  # Parsed at load time
                         
-                        if price_history and 0 in price_history and price_history[0] is not None:
-                            entry_price = float(price_history[0])
-                            price_periods = []
-                            price_values = []
+                            if price_history and 0 in price_history and price_history[0] is not None:
+                                entry_price = float(price_history[0])
                             
-                            # Collect price history points
-                            for period in sorted(price_history.keys()):
-                                if price_history[period] is not None and period >= 0:
-                                    try:
-                                        relative_price = (float(price_history[period]) / entry_price) * 100
-                                        price_periods.append(period)
-                                        price_values.append(relative_price)
-                                    except (ValueError, TypeError):
-                                        continue
+                                # Collect price history points relative to the entry price
+                                history = pd.to_numeric(pd.Series(price_history, dtype=object), errors='coerce').dropna()
+                                history = history[history.index >= 0].sort_index()
+                                price_periods = history.index.to_numpy(dtype=np.int16)
+                                price_values = (history.to_numpy(dtype=np.float32) / entry_price) * 100
                             
-                            # Add price history line and dots
-                            if len(price_periods) > 1:
-                                fig.add_trace(go.Scatter(
-                                    x=price_periods,
-                                    y=price_values,
-                                    mode='lines+markers',
-                                    line=dict(color='red', width=1),
-                                    marker=dict(color='red', size=6),
-                                    name='Price History',
-                                    showlegend=True
-                                ))
-                            elif len(price_periods) == 1:
-                                # Single point case
-                                fig.add_trace(go.Scatter(
-                                    x=price_periods,
-                                    y=price_values,
-                                    mode='markers',
-                                    marker=dict(color='red', size=6),
-                                    name='Price History',
-                                    showlegend=True
-                                ))
+                                # Add price history line and dots
+                                if len(price_periods) > 1:
+                                    traces.append(go.Scatter(
+                                        x=price_periods,
+                                        y=price_values,
+                                        mode='lines+markers',
+                                        line=dict(color='red', width=1),
+                                        marker=dict(color='red', size=6),
+                                        name='Price History',
+                                        showlegend=True
+                                    ))
+                                    rows.append(1)
+                                elif len(price_periods) == 1:
+                                    # Single point case
+                                    traces.append(go.Scatter(
+                                        x=price_periods,
+                                        y=price_values,
+                                        mode='markers',
+                                        marker=dict(color='red', size=6),
+                                        name='Price History',
+                                        showlegend=True
+                                    ))
+                                    rows.append(1)
                             
-                            # Store the last price history point for connecting to current price
-                            if price_periods:
-                                last_price_period = price_periods[-1]
-                                last_price_value = price_values[-1]
+                                # Store the last price history point for connecting to current price
+                                if len(price_periods) > 0:
+                                    last_price_period = price_periods[-1]
+                                    last_price_value = price_values[-1]
+                    
+                        # Add actual volume history if available
+                        if 'volume_history' in mc_selected_ticker and mc_selected_ticker['volume_history']:
+                            volume_history = mc_selected_ticker['volume_history']  # Parsed at load time
+                        
+                            if volume_history and 0 in volume_history and volume_history[0] is not None:
+                                # Collect volume history points
+                                history = pd.to_numeric(pd.Series(volume_history, dtype=object), errors='coerce').dropna()
+                                history = history[history.index >= 0].sort_index()
+                                volume_periods = history.index.to_numpy(dtype=np.int16)
+                                volume_values = history.to_numpy(dtype=np.float32)
+                            
+                                # Add volume history line (red lines for latest signal)
+                                if len(volume_periods) > 1:
+                                    traces.append(go.Scatter(
+                                        x=volume_periods,
+                                        y=volume_values,
+                                        mode='lines+markers',
+                                        line=dict(color='red', width=2),
+                                        marker=dict(color='red', size=6),
+                                        name='Latest Signal Volume',
+                                        showlegend=True
+                                    ))
+                                    rows.append(2)
+                                elif len(volume_periods) == 1:
+                                    # Single point case
+                                    traces.append(go.Scatter(
+                                        x=volume_periods,
+                                        y=volume_values,
+                                        mode='markers',
+                                        marker=dict(color='red', size=6),
+                                        name='Latest Signal Volume',
+                                        showlegend=True
+                                    ))
+                                    rows.append(2)
                     
-                    # Add actual volume history if available
-                    if 'volume_history' in mc_selected_ticker and mc_selected_ticker['volume_history']:
-                        volume_history = mc_selected_ticker['volume_history']
-                        if isinstance(volume_history, str):
-                            try:
-                                import ast
-                                volume_history = ast.literal_eval(str(volume_history))
-                            except Exception:
-                                # If parsing fails, silently set to empty dict to avoid spam
-                                volume_history = {}
+                        # Add current price at current period (updated to avoid duplicate)
+                        if ('current_period' in mc_selected_ticker and 'current_price' in mc_selected_ticker and 
+                            'latest_signal_price' in mc_selected_ticker and 'price_history' in mc_selected_ticker):
+                            current_period = mc_selected_ticker['current_period']
+                            price_history = mc_selected_ticker['price_history']
                         
-                        if volume_history and 0 in volume_history and volume_history[0] is not None:
-                            volume_periods = []
-                            volume_values = []
+                            # Calculate current price relative value
+                            current_price_relative = None
+                            if mc_selected_ticker['latest_signal_price']:
+                                price_change = ((mc_selected_ticker['current_price'] - mc_selected_ticker['latest_signal_price']) / 
+                                                 mc_selected_ticker['latest_signal_price'] * 100)
+                                current_price_relative = 100 + price_change
+                        
+                            # Only add current price marker if it's not already in price_history
+                            if (isinstance(price_history, dict) and current_period not in price_history and 
+                                current_period > 0 and current_price_relative is not None):
                             
-                            # Collect volume history points
-                            for period in sorted(volume_history.keys()):
-                                if volume_history[period] is not None and period >= 0:
-                                    try:
-                                        volume_periods.append(period)
-                                        volume_values.append(float(volume_history[period]))
-                                    except (ValueError, TypeError):
-                                        continue
+                                # Add connecting line from last price history point to current price
+                                if last_price_period is not None and last_price_value is not None:
+                                    traces.append(go.Scatter(
+                                        x=[last_price_period, current_period],
+                                        y=[last_price_value, current_price_relative],
+                                        mode='lines',
+                                        line=dict(color='red', width=1, dash='dot'),
+                                        name='Price Projection',
+                                        showlegend=False
+                                    ))
+                                    rows.append(1)
                             
-                            # Add volume history line (red lines for latest signal)
-                            if len(volume_periods) > 1:
-                                fig.add_trace(go.Scatter(
-                                    x=volume_periods,
-                                    y=volume_values,
-                                    mode='lines+markers',
-                                    line=dict(color='red', width=2),
-                                    marker=dict(color='red', size=6),
-                                    name='Latest Signal Volume',
+                                # Add current price star
+                                traces.append(go.Scatter(
+                                    x=[current_period],
+                                    y=[current_price_relative],
+                                    mode='markers',
+                                    marker=dict(color='red', size=10, symbol='star'),
+                                    name='Current Price',
                                     showlegend=True
-                                ), row=2, col=1)
-                            elif len(volume_periods) == 1:
-                                # Single point case
-                                fig.add_trace(go.Scatter(
-                                    x=volume_periods,
-                                    y=volume_values,
+                                ))
+                                rows.append(1)
+                            elif not price_history and current_period > 0 and current_price_relative is not None:
+                                # If no price_history at all, still show current price
+                                traces.append(go.Scatter(
+                                    x=[current_period],
+                                    y=[current_price_relative],
                                     mode='markers',
-                                    marker=dict(color='red', size=6),
-                                    name='Latest Signal Volume',
+                                    marker=dict(color='red', size=10, symbol='star'),
+                                    name='Current Price',
                                     showlegend=True
-                                ), row=2, col=1)
-                    
-                    # Add current price at current period (updated to avoid duplicate)
-                    if ('current_period' in mc_selected_ticker and 'current_price' in mc_selected_ticker and 
-                        'latest_signal_price' in mc_selected_ticker and 'price_history' in mc_selected_ticker):
-                        current_period = mc_selected_ticker['current_period']
-                        price_history = mc_selected_ticker['price_history']
-                        
-                        # Parse price_history if it's a string
-                        if isinstance(price_history, str):
-                            try:
-                                import ast
-                                price_history = ast.literal_eval(str(price_history))
-                            except:
-                                price_history = {}
-                        
-                        # Calculate current price relative value
-                        current_price_relative = None
-                        if mc_selected_ticker['latest_signal_price']:
-                            price_change = ((mc_selected_ticker['current_price'] - mc_selected_ticker['latest_signal_price']) / 
-                                             mc_selected_ticker['latest_signal_price'] * 100)
-                            current_price_relative = 100 + price_change
-                        
-                        # Only add current price marker if it's not already in price_history
-                        if (isinstance(price_history, dict) and current_period not in price_history and 
-                            current_period > 0 and current_price_relative is not None):
-                            
-                            # Add connecting line from last price history point to current price
-                            if last_price_period is not None and last_price_value is not None:
-                                fig.add_trace(go.Scatter(
-                                    x=[last_price_period, current_period],
-                                    y=[last_price_value, current_price_relative],
-                                    mode='lines',
-                                    line=dict(color='red', width=1, dash='dot'),
-                                    name='Price Projection',
-                                    showlegend=False
                                 ))
-                            
-                            # Add current price star
-                            fig.add_trace(go.Scatter(
-                                x=[current_period],
-                                y=[current_price_relative],
-                                mode='markers',
-                                marker=dict(color='red', size=10, symbol='star'),
-                                name='Current Price',
-                                showlegend=True
+                                rows.append(1)
+                    
+                        # Find the first period with data (usually period 3)
+                        first_period = None
+                        first_value = None
+                    
+                        # Check if we have boxplot data for baseline connection (reuses the per-period medians above)
+                        if mc_filtered_returns is not None and not mc_filtered_returns.empty:
+                            first_period = median_periods[0]
+                            first_value = median_price_values[0]
+                    
+                        # If no boxplot data, use scatter plot data
+                        if first_period is None or first_value is None:
+                            stock_returns = mc_avg_returns.loc[1:100]  # Full range from 1 to 100
+                            if not stock_returns.empty:
+                                first_period = stock_returns.index[0]
+                                first_value = 100 + stock_returns.iloc[0]
+                    
+                        # Add connecting line if we found a first data point
+                        if first_period is not None and first_value is not None:
+                            traces.append(go.Scatter(
+                                x=[0, first_period],
+                                y=[100, first_value],
+                                mode='lines',
+                                line=dict(color='gray', width=1),
+                                name='Baseline Connection',
+                                showlegend=False
                             ))
-                        elif not price_history and current_period > 0 and current_price_relative is not None:
-                            # If no price_history at all, still show current price
-                            fig.add_trace(go.Scatter(
-                                x=[current_period],
-                                y=[current_price_relative],
-                                mode='markers',
-                                marker=dict(color='red', size=10, symbol='star'),
-                                name='Current Price',
-                                showlegend=True
-                            ))
-                    
-                    # Add baseline reference line at y=100 (add after all traces for visibility)
-                    fig.add_hline(y=100, line_dash="dash", line_color="gray", line_width=1, 
-                                 annotation_text="Short Price (Baseline)", annotation_position="top right")
-                    
-                    # Find the first period with data (usually period 3)
-                    first_period = None
-                    first_value = None
-                    
-                    # Check if we have boxplot data for baseline connection
-                    if mc_returns_df is not None and not mc_returns_df.empty:
-                        filtered_returns = mc_returns_df[
-                            (mc_returns_df['ticker'] == mc_ticker_filter) &
-                            (mc_returns_df['interval'] == mc_selected_interval)
-                        ]
-                        if not filtered_returns.empty:
-                            periods_with_data = sorted(filtered_returns['period'].unique())
-                            if periods_with_data:
-                                first_period = periods_with_data[0]
-                                period_returns = filtered_returns[filtered_returns['period'] == first_period]['return'].values
-                                if len(period_returns) > 0:
-                                    first_value = 100 + np.median(period_returns)
-                    
-                    # If no boxplot data, use scatter plot data
-                    if first_period is None or first_value is None:
-                        periods = list(range(1, 101))  # Full range from 1 to 100
-                        for period in periods:
-                            if f'avg_return_{period}' in mc_selected_ticker:
-                                first_period = period
-                                first_value = 100 + mc_selected_ticker[f'avg_return_{period}']
-                                break
-                    
-                    # Add connecting line if we found a first data point
-                    if first_period is not None and first_value is not None:
-                        fig.add_trace(go.Scatter(
-                            x=[0, first_period],
-                            y=[100, first_value],
-                            mode='lines',
-                            line=dict(color='gray', width=1),
-                            name='Baseline Connection',
-                            showlegend=False
-                        ))
-                    
-                    # Find the period with minimum return (best for MC signals - more negative is better)
-                    min_return = float('inf')
-                    best_period = None
-                    periods = list(range(1, 101))  # Full range from 1 to 100
-                    for period in periods:
-                        if f'avg_return_{period}' in mc_selected_ticker:
-                            if mc_selected_ticker[f'avg_return_{period}'] < min_return:
-                                min_return = mc_selected_ticker[f'avg_return_{period}']
-                                best_period = period
-                    
-                    # Update layout
-                    title_html = (
-                        f"<span style='font-size:24px'><b>{mc_selected_ticker['ticker']} ({mc_selected_ticker['interval']})</b></span><br>"
-                        f"<span style='font-size:12px'>best period: {best_period}\t  "
-                        f"best return: {min_return:.2f}%  "
-                        f"success rate: {mc_selected_ticker[f'success_rate_{best_period}']:.2f}\t  "
-                        f"test count: {mc_selected_ticker[f'test_count_{best_period}']}</span>"
-                    )
+                            rows.append(1)
+                    
+                        fig.add_traces(traces, rows=rows, cols=[1] * len(traces))
+                    
+                        # Add baseline reference line at y=100 (add after all traces for visibility)
+                        fig.add_hline(y=100, line_dash="dash", line_color="gray", line_width=1, 
+                                     annotation_text="Short Price (Baseline)", annotation_position="top right")
+                    
+                        # Find the period with minimum return (best for MC signals - more negative is better)
+                        min_return = float('inf')
+                        best_period = None
+                        stock_returns = mc_avg_returns.loc[1:100]  # Full range from 1 to 100
+                        if not stock_returns.empty:
+                            best_period = int(stock_returns.idxmin())
+                            min_return = stock_returns.min()
+                    
+                        # Update layout
+                        title_html = (
+                            f"<span style='font-size:24px'><b>{mc_selected_ticker['ticker']} ({mc_selected_ticker['interval']})</b></span><br>"
+                            f"<span style='font-size:12px'>best period: {best_period}\t  "
+                            f"best return: {min_return:.2f}%  "
+                            f"success rate: {mc_selected_ticker[f'success_rate_{best_period}']:.2f}\t  "
+                            f"test count: {mc_selected_ticker[f'test_count_{best_period}']}</span>"
+                        )
                                     
-                    fig.update_layout(
-                        legend=dict(font=dict(color='black')),
-                        title=dict(
-                            text=title_html,
-                            x=0.5,
-                            font=dict(size=24, color='black'),
-                            xanchor='center',
-                            yanchor='top'
-                        ),
-                        showlegend=True,
-                        height=566,  # Increased height for dual subplots
-                        plot_bgcolor='white',
-                        paper_bgcolor='white'
-                    )
-                    
-                    # Update axes for subplots with synchronized x-axis
-                    fig.update_xaxes(
-                        title_text="Period", 
-                        row=1, col=1,
-                        range=[-5, 105],  # Set consistent x-axis range
-                        showgrid=True,
-                        gridwidth=1,
-                        gridcolor='lightgray',
-                        showline=True,
-                        linewidth=1,
-                        linecolor='black', 
-                        tickfont=dict(color='black'),
-                        title=dict(text="Period", font=dict(color='black'))
-                    )
-                    fig.update_xaxes(
-                        title_text="Period", 
-                        row=2, col=1,
-                        range=[-5, 105],  # Same x-axis range as top subplot
-                        showgrid=True,
-                        gridwidth=1,
-                        gridcolor='lightgray',
-                        showline=True,
-                        linewidth=1,
-                        linecolor='black',
-                        tickfont=dict(color='black'),
-                        title=dict(text="Period", font=dict(color='black'))
-                    )
-                    fig.update_yaxes(
-                        title_text="Relative Price (Baseline = 100)", 
-                        row=1, col=1,
-                        showgrid=True,
-                        gridwidth=1,
-                        gridcolor='lightgray',
-                        showline=True,
-                        linewidth=1,
-                        linecolor='black',
-                        tickfont=dict(color='black'),
-                        title=dict(text="Relative Price (Baseline = 100)", font=dict(color='black'))
-                    )
-                    fig.update_yaxes(
-                        title_text="Volume", 
-                        row=2, col=1,
-                        showgrid=True,
-                        gridwidth=1,
-                        gridcolor='lightgray',
-                        showline=True,
-                        linewidth=1,
-                        linecolor='black',
-                        tickfont=dict(color='black'),
-                        title=dict(text="Volume", font=dict(color='black'))
-                    )
+                        fig.update_layout(
+                            legend=dict(font=dict(color='black')),
+                            title=dict(
+                                text=title_html,
+                                x=0.5,
+                                font=dict(size=24, color='black'),
+                                xanchor='center',
+                                yanchor='top'
+                            ),
+                            showlegend=True,
+                            height=566,  # Increased height for dual subplots
+                            plot_bgcolor='white',
+                            paper_bgcolor='white'
+                        )
+                    
+                        # Update axes for subplots with synchronized x-axis
+                        fig.update_xaxes(
+                            title_text="Period", 
+                            row=1, col=1,
+                            range=[-5, 105],  # Set consistent x-axis range
+                            showgrid=True,
+                            gridwidth=1,
+                            gridcolor='lightgray',
+                            showline=True,
+                            linewidth=1,
+                            linecolor='black', 
+                            tickfont=dict(color='black'),
+                            title=dict(text="Period", font=dict(color='black'))
+                        )
+                        fig.update_xaxes(
+                            title_text="Period", 
+                            row=2, col=1,
+                            range=[-5, 105],  # Same x-axis range as top subplot
+                            showgrid=True,
+                            gridwidth=1,
+                            gridcolor='lightgray',
+                            showline=True,
+                            linewidth=1,
+                            linecolor='black',
+                            tickfont=dict(color='black'),
+                            title=dict(text="Period", font=dict(color='black'))
+                        )
+                        fig.update_yaxes(
+                            title_text="Relative Price (Baseline = 100)", 
+                            row=1, col=1,
+                            showgrid=True,
+                            gridwidth=1,
+                            gridcolor='lightgray',
+                            showline=True,
+                            linewidth=1,
+                            linecolor='black',
+                            tickfont=dict(color='black'),
+                            title=dict(text="Relative Price (Baseline = 100)", font=dict(color='black'))
+                        )
+                        fig.update_yaxes(
+                            title_text="Volume", 
+                            row=2, col=1,
+                            showgrid=True,
+                            gridwidth=1,
+                            gridcolor='lightgray',
+                            showline=True,
+                            linewidth=1,
+                            linecolor='black',
+                            tickfont=dict(color='black'),
+                            title=dict(text="Volume", font=dict(color='black'))
+                        )
+                        
+                        st.session_state.mc_waikiki_fig_key = mc_fig_key
+                        st.session_state.mc_waikiki_fig = fig
                     
                     # Display the plot
-                    st.plotly_chart(fig, use_container_width=True)
+                    st.plotly_chart(fig, use_container_width=True, key=f"mc_waikiki_chart_{selected_file}")
 
                 elif mc_ticker_filter:
                     st.info("No matching stocks found for the selected criteria.")
                 else:
                     st.info("Please select a stock from the tables below to view details.")
 
-        with mc_waikiki_tables_col:
-            # Helper for single-select AgGrid for MC
-            def mc_waikiki_aggrid_editor(df, tab_key):
-                if df is not None and not df.empty:
-                    df = df.copy()
-                    
-                    # To prevent ArrowTypeError from mixed types, convert object columns to string
-                    for col in df.columns:
-                        if df[col].dtype == 'object':
-                            df[col] = df[col].astype(str)
+        mc_waikiki_viz_col, mc_waikiki_tables_col = st.columns([1, 1])
 
-                    # Round all numeric columns to 2 decimal places
-                    for col in df.columns:
-                        if df[col].dtype in ['float64', 'float32']:
-                            df[col] = df[col].round(2)
-                    
-                    # Configure AgGrid options
-                    gb = GridOptionsBuilder.from_dataframe(df)
-                    gb.configure_selection('single', use_checkbox=True, groupSelectsChildren=False, groupSelectsFiltered=False)
-                    gb.configure_grid_options(domLayout='normal', rowSelection='single')
-                    gb.configure_default_column(editable=False, filterable=True, sortable=True, resizable=True)
-                    
-                    # Configure specific columns - only minWidth for ticker, latest_signal, current_time
-                    # All others use fixed width based on header length
-                    
-                    # Only these 3 columns get minWidth (variable content needs flexibility)
-                    if 'ticker' in df.columns:
-                        gb.configure_column('ticker', pinned='left', minWidth=90)
-                    if 'latest_signal' in df.columns:
-                        gb.configure_column('latest_signal', minWidth=120)
-                    if 'current_time' in df.columns:
-                        gb.configure_column('current_time', minWidth=100)
-                    
-                    # All other columns get fixed width based on header length
-                    column_widths = {
-                        'interval': 80,           # 8 chars: "interval"
-                        'hold_time': 90,          # 9 chars: "hold_time"
-                        'exp_return': 100,         # 10 chars: "exp_return"
-                        'signal_count': 120,       # 12 chars: "signal_count"
-                        'latest_signal_price': 150, # 18 chars: "latest_signal_price"
-                        'current_price': 120,      # 13 chars: "current_price"
-                        'current_period': 120,    # 14 chars: "current_period"
-                        'test_count': 100,         # 10 chars: "test_count"
-                        'success_rate': 110,       # 12 chars: "success_rate"
-                        'best_period': 110,        # 11 chars: "best_period"
-                        'max_return': 100,         # 10 chars: "max_return"
-                        'min_return': 100,         # 10 chars: "min_return"
-                        'avg_return': 100,         # 10 chars: "avg_return"
-                        # NX columns
-                        'nx_1d_signal': 100,      # 12 chars: "nx_1d_signal"
-                        'nx_30m_signal': 110,     # 13 chars: "nx_30m_signal"
-                        'nx_1h_signal': 100,      # 12 chars: "nx_1h_signal"
-                        'nx_5m_signal': 100,      # 12 chars: "nx_5m_signal"
-                        'nx_1d': 80,              # 6 chars: "nx_1d"
-                        'nx_30m': 90,             # 7 chars: "nx_30m"
-                        'nx_1h': 80,              # 6 chars: "nx_1h"
-                        'nx_5m': 80,              # 6 chars: "nx_5m"
-                        'nx_4h': 80,              # 6 chars: "nx_4h"
-                    }
-                    
-                    # Add CD signal analysis column widths for MC analysis
-                    cd_column_widths = {
-                        'cd_signals_before_mc': 150,        # 18 chars: "cd_signals_before_mc"
-                        'cd_at_bottom_price_count': 160,    # 21 chars: "cd_at_bottom_price_count"
-                        'cd_at_bottom_price_rate': 150,     # 20 chars: "cd_at_bottom_price_rate"
-                        'avg_cd_price_percentile': 170,     # 21 chars: "avg_cd_price_percentile"
-                        'avg_cd_increase_after': 160,       # 18 chars: "avg_cd_increase_after"
-                        'avg_cd_criteria_met': 150,         # 16 chars: "avg_cd_criteria_met"
-                        'latest_cd_date': 160,              # 13 chars: "latest_cd_date"
-                        'latest_cd_price': 140,             # 14 chars: "latest_cd_price"
-                        'latest_cd_at_bottom_price': 180,   # 22 chars: "latest_cd_at_bottom_price"
-                        'latest_cd_price_percentile': 190,  # 24 chars: "latest_cd_price_percentile"
-                        'latest_cd_increase_after': 180,    # 21 chars: "latest_cd_increase_after"
-                        'latest_cd_criteria_met': 170,      # 18 chars: "latest_cd_criteria_met"
-                    }
-                    
-                    # Configure columns with specific widths
-                    for col_name, width in column_widths.items():
-                        if col_name in df.columns:
-                            if col_name in ['exp_return', 'latest_signal_price', 'current_price', 'success_rate', 'max_return', 'min_return', 'avg_return']:
-                                gb.configure_column(col_name, type=['numericColumn', 'numberColumnFilter'], precision=2, width=width)
-                            elif col_name in ['nx_1d_signal', 'nx_30m_signal', 'nx_1h_signal', 'nx_5m_signal', 'nx_1d', 'nx_30m', 'nx_1h', 'nx_5m', 'nx_4h']:
-                                gb.configure_column(col_name, type=['booleanColumn'], width=width)
-                            else:
-                                gb.configure_column(col_name, width=width)
-                    
-                    # Configure CD signal analysis columns for MC analysis
-                    for col_name, width in cd_column_widths.items():
-                        if col_name in df.columns:
-                            if col_name in ['cd_at_bottom_price_rate', 'avg_cd_price_percentile', 'avg_cd_increase_after', 'avg_cd_criteria_met', 
-                                          'latest_cd_price', 'latest_cd_price_percentile', 'latest_cd_increase_after']:
-                                gb.configure_column(col_name, type=['numericColumn', 'numberColumnFilter'], precision=2, width=width)
-                            elif col_name in ['latest_cd_date']:
-                                gb.configure_column(col_name, minWidth=width)
-                            else:
-                                gb.configure_column(col_name, width=width)
-                    
-                    # Handle dynamic columns (test_count_X, success_rate_X, avg_return_X where X is a number)
-                    for col in df.columns:
-                        if col.startswith('test_count_'):
-                            gb.configure_column(col, width=85)  # 10-14 chars: "test_count_XX"
-                        elif col.startswith('success_rate_'):
-                            gb.configure_column(col, type=['numericColumn', 'numberColumnFilter'], precision=2, width=110)  # 14-18 chars: "success_rate_XXX"
-                        elif col.startswith('avg_return_'):
-                            gb.configure_column(col, type=['numericColumn', 'numberColumnFilter'], precision=2, width=100)  # 12-16 chars: "avg_return_XXX"
-                    
-                    # Enable pagination for large datasets
-                    gb.configure_pagination(paginationAutoPageSize=True)
-                    
-                    grid_options = gb.build()
-                    
-                    # Suppress the grid's auto-sizing to enforce our fixed-width columns
-                    grid_options['suppressSizeToFit'] = True
+        with mc_waikiki_viz_col:
+            render_mc_waikiki_viz(selected_file)
+
+        with mc_waikiki_tables_col:
+            # Grid options depend only on the table schema, so tabs and reruns with the
+            # same columns share one built configuration
+            @st.cache_data(show_spinner=False, max_entries=32)
+            def build_mc_waikiki_grid_options(columns_tuple):
+                df = pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in columns_tuple})
+                
+                # Configure AgGrid options
+                gb = GridOptionsBuilder.from_dataframe(df)
+                gb.configure_selection('single', use_checkbox=True, groupSelectsChildren=False, groupSelectsFiltered=False)
+                gb.configure_grid_options(domLayout='normal', rowSelection='single')
+                gb.configure_default_column(editable=False, filterable=True, sortable=True, resizable=True)
+                
+                # Configure specific columns - only minWidth for ticker, latest_signal, current_time
+                # All others use fixed width based on header length
+                
+                # Only these 3 columns get minWidth (variable content needs flexibility)
+                min_width_columns = {
+                    'ticker': dict(pinned='left', minWidth=90),
+                    'latest_signal': dict(minWidth=120),
+                    'current_time': dict(minWidth=100),
+                }
+                
+                # All other columns get fixed width based on header length
+                column_widths = {
+                    'interval': 80,           # 8 chars: "interval"
+                    'hold_time': 90,          # 9 chars: "hold_time"
+                    'exp_return': 100,         # 10 chars: "exp_return"
+                    'signal_count': 120,       # 12 chars: "signal_count"
+                    'latest_signal_price': 150, # 18 chars: "latest_signal_price"
+                    'current_price': 120,      # 13 chars: "current_price"
+                    'current_period': 120,    # 14 chars: "current_period"
+                    'test_count': 100,         # 10 chars: "test_count"
+                    'success_rate': 110,       # 12 chars: "success_rate"
+                    'best_period': 110,        # 11 chars: "best_period"
+                    'max_return': 100,         # 10 chars: "max_return"
+                    'min_return': 100,         # 10 chars: "min_return"
+                    'avg_return': 100,         # 10 chars: "avg_return"
+                    # NX columns
+                    'nx_1d_signal': 100,      # 12 chars: "nx_1d_signal"
+                    'nx_30m_signal': 110,     # 13 chars: "nx_30m_signal"
+                    'nx_1h_signal': 100,      # 12 chars: "nx_1h_signal"
+                    'nx_5m_signal': 100,      # 12 chars: "nx_5m_signal"
+                    'nx_1d': 80,              # 6 chars: "nx_1d"
+                    'nx_30m': 90,             # 7 chars: "nx_30m"
+                    'nx_1h': 80,              # 6 chars: "nx_1h"
+                    'nx_5m': 80,              # 6 chars: "nx_5m"
+                    'nx_4h': 80,              # 6 chars: "nx_4h"
+                }
+                
+                # Add CD signal analysis column widths for MC analysis
+                cd_column_widths = {
+                    'cd_signals_before_mc': 150,        # 18 chars: "cd_signals_before_mc"
+                    'cd_at_bottom_price_count': 160,    # 21 chars: "cd_at_bottom_price_count"
+                    'cd_at_bottom_price_rate': 150,     # 20 chars: "cd_at_bottom_price_rate"
+                    'avg_cd_price_percentile': 170,     # 21 chars: "avg_cd_price_percentile"
+                    'avg_cd_increase_after': 160,       # 18 chars: "avg_cd_increase_after"
+                    'avg_cd_criteria_met': 150,         # 16 chars: "avg_cd_criteria_met"
+                    'latest_cd_date': 160,              # 13 chars: "latest_cd_date"
+                    'latest_cd_price': 140,             # 14 chars: "latest_cd_price"
+                    'latest_cd_at_bottom_price': 180,   # 22 chars: "latest_cd_at_bottom_price"
+                    'latest_cd_price_percentile': 190,  # 24 chars: "latest_cd_price_percentile"
+                    'latest_cd_increase_after': 180,    # 21 chars: "latest_cd_increase_after"
+                    'latest_cd_criteria_met': 170,      # 18 chars: "latest_cd_criteria_met"
+                }
+                
+                numeric_columns = {'exp_return', 'latest_signal_price', 'current_price', 'success_rate', 'max_return', 'min_return', 'avg_return'}
+                boolean_columns = {'nx_1d_signal', 'nx_30m_signal', 'nx_1h_signal', 'nx_5m_signal', 'nx_1d', 'nx_30m', 'nx_1h', 'nx_5m', 'nx_4h'}
+                cd_numeric_columns = {'cd_at_bottom_price_rate', 'avg_cd_price_percentile', 'avg_cd_increase_after', 'avg_cd_criteria_met', 
+                                      'latest_cd_price', 'latest_cd_price_percentile', 'latest_cd_increase_after'}
+                numeric_config = dict(type=['numericColumn', 'numberColumnFilter'], precision=2)
+                
+                # Plan every column's configuration in one pass, then apply the plan
+                plan = {}
+                for col in df.columns:
+                    if col in min_width_columns:
+                        plan[col] = min_width_columns[col]
+                    elif col in column_widths:
+                        width = column_widths[col]
+                        if col in numeric_columns:
+                            plan[col] = dict(numeric_config, width=width)
+                        elif col in boolean_columns:
+                            plan[col] = dict(type=['booleanColumn'], width=width)
+                        else:
+                            plan[col] = dict(width=width)
+                    elif col in cd_column_widths:
+                        # Configure CD signal analysis columns for MC analysis
+                        width = cd_column_widths[col]
+                        if col in cd_numeric_columns:
+                            plan[col] = dict(numeric_config, width=width)
+                        elif col == 'latest_cd_date':
+                            plan[col] = dict(minWidth=width)
+                        else:
+                            plan[col] = dict(width=width)
+                    else:
+                        # Handle dynamic columns (test_count_X, success_rate_X, avg_return_X where X is a number)
+                        match = _DYNAMIC_COLUMN_PATTERN.match(col)
+                        if match:
+                            plan[col] = _DYNAMIC_COLUMN_CONFIG[match.group(1)]
+                
+                for col, config in plan.items():
+                    gb.configure_column(col, **config)
+                
+                # Enable pagination for large datasets
+                gb.configure_pagination(paginationAutoPageSize=True)
+                
+                grid_options = gb.build()
+                
+                # Only the planned columns are shown; the rest (returns_X/volumes_X lists,
+                # price/volume history, avg_volume_X) are dropped before serialization
+                grid_options['columnDefs'] = [col_def for col_def in grid_options['columnDefs'] if col_def['field'] in plan]
+                
+                # Suppress the grid's auto-sizing to enforce our fixed-width columns
+                grid_options['suppressSizeToFit'] = True
+                
+                return grid_options, tuple(plan)
+
+            # Prepare the display frame once per distinct table; the column pruning and
+            # type conversion are skipped on reruns
+            @st.cache_data(show_spinner=False, max_entries=32)
+            def prepare_mc_waikiki_grid(df):
+                grid_options, visible_columns = build_mc_waikiki_grid_options(tuple(zip(df.columns, df.dtypes.astype(str))))
+                df = df[list(visible_columns)]
+                
+                # To prevent ArrowTypeError from mixed types, convert object columns to string
+                df = _arrow_safe_object_columns(df)
+
+                # Round all numeric columns to 2 decimal places
+                float_cols = df.select_dtypes(include=['float64', 'float32']).columns
+                if len(float_cols) > 0:
+                    df = df.round(dict.fromkeys(float_cols, 2))
+                
+                # Counts fit in int32; floats stay float64 since rounded float32 values
+                # serialize to longer JSON (0.13 -> 0.1299999952)
+                int_cols = df.select_dtypes(include='int64').columns
+                if len(int_cols) > 0:
+                    df = df.astype(dict.fromkeys(int_cols, 'int32'))
+                
+                return df, grid_options
+
+            # Helper for single-select AgGrid for MC
+            def mc_waikiki_aggrid_editor(df, tab_key):
+                if df is not None and not df.empty:
+                    # Very large tables go to the browser one window of rows at a time. The
+                    # grid's own sort/filter then only sees the current window, so the
+                    # threshold is high enough that normal stock lists are shown in full
+                    rows_per_window = 5000
+                    if len(df) > rows_per_window:
+                        n_windows = -(-len(df) // rows_per_window)
+                        window = st.number_input(f"Rows window (1-{n_windows}, {rows_per_window} rows each):",
+                                                 min_value=1, max_value=n_windows, value=1, step=1,
+                                                 key=f"mc_waikiki_window_{tab_key}_{selected_file}")
+                        st.caption(f"This table has {len(df)} rows and is shown {rows_per_window} at a time. "
+                                   "Sorting and filtering in the grid's column headers only apply to the "
+                                   "current window; use the ticker and interval filters above to search "
+                                   "the whole table.")
+                        df = df.iloc[(window - 1) * rows_per_window:window * rows_per_window]
+                    
+                    df, grid_options = prepare_mc_waikiki_grid(df)
                     
                     # Display AgGrid
                     grid_response = AgGrid(
@@ -2635,98 +2963,65 @@ elif page == "MC Analysis (卖出)":
                     st.info("No data available for this table. Please run analysis first.")
                     return None
 
-            tabs = st.tabs([
-                "Best Intervals (50)", 
-                "Best Intervals (20)", 
-                "Best Intervals (100)", 
-                "High Return Intervals",
-                "Interval Details"
-            ])
-
-            # Display best intervals (50) - for MC, best means most negative returns
-            with tabs[0]:
-                df, message = load_results('mc_eval_best_intervals_50_', selected_file, 'avg_return_10')
-                if df is not None:
-                    if mc_waikiki_ticker_filter:
-                        df = df[df['ticker'].str.contains(mc_waikiki_ticker_filter, case=False)]
-                    
-                    if 'interval' in df.columns:
-                        intervals = sorted(df['interval'].unique())
-                        selected_intervals = st.multiselect("Filter by interval:", intervals, default=intervals, key=f"mc_interval_filter_best_50_{selected_file}")
-                        if selected_intervals:
-                            df = df[df['interval'].isin(selected_intervals)]
-                    mc_waikiki_aggrid_editor(df, '50')
-                else:
-                    st.info("No best intervals data available for 50-period analysis. Please run MC Signal Evaluation first.")
-
-            # Display best intervals (20)
-            with tabs[1]:
-                df, message = load_results('mc_eval_best_intervals_20_', selected_file, 'avg_return_10')
+            # Render one Waikiki table: load, apply the shared ticker filter and the
+            # table's interval filter, then show the grid. The table is a fragment, so
+            # changing its interval filter only reruns the table.
+            @st.fragment
+            def render_mc_waikiki_table(file_pattern, sort_col, tab_key, filter_key, empty_message, recent_signals=False):
+                df, message = load_results(file_pattern, selected_file, sort_col)
                 if df is not None:
+                    # Combine the ticker, signal and interval filters into one mask so the
+                    # frame is sliced once
+                    mask = np.ones(len(df), dtype=bool)
                     if mc_waikiki_ticker_filter:
-                        df = df[df['ticker'].str.contains(mc_waikiki_ticker_filter, case=False)]
+                        mask &= df['ticker'].str.contains(mc_waikiki_ticker_filter, case=False, regex=False, na=False).to_numpy()
                     
-                    if 'interval' in df.columns:
-                        intervals = sorted(df['interval'].unique())
-                        selected_intervals = st.multiselect("Filter by interval:", intervals, default=intervals, key=f"mc_interval_filter_best_20_{selected_file}")
-                        if selected_intervals:
-                            df = df[df['interval'].isin(selected_intervals)]
-                    mc_waikiki_aggrid_editor(df, '20')
-                else:
-                    st.info("No best intervals data available for 20-period analysis. Please run MC Signal Evaluation first.")
-
-            # Display best intervals (100)
-            with tabs[2]:
-                df, message = load_results('mc_eval_best_intervals_100_', selected_file, 'avg_return_10')
-                if df is not None:
-                    if mc_waikiki_ticker_filter:
-                        df = df[df['ticker'].str.contains(mc_waikiki_ticker_filter, case=False)]
+                    if recent_signals:
+                        if 'latest_signal' not in df.columns:
+                            st.info("No signal date information available in the results.")
+                            return
+                        mask &= df['latest_signal'].notna().to_numpy()
                     
                     if 'interval' in df.columns:
-                        intervals = sorted(df['interval'].unique())
-                        selected_intervals = st.multiselect("Filter by interval:", intervals, default=intervals, key=f"mc_interval_filter_best_100_{selected_file}")
-                        if selected_intervals:
-                            df = df[df['interval'].isin(selected_intervals)]
-                    mc_waikiki_aggrid_editor(df, '100')
-                else:
-                    st.info("No best intervals data available for 100-period analysis. Please run MC Signal Evaluation first.")
-
-            # Display high return intervals (negative returns for MC)
-            with tabs[3]:
-                df, message = load_results('mc_eval_good_signals_', selected_file, 'latest_signal')
-                if df is not None:
-                    if mc_waikiki_ticker_filter:
-                        df = df[df['ticker'].str.contains(mc_waikiki_ticker_filter, case=False)]
-                    
-                    if 'latest_signal' in df.columns:
-                        df = df[df['latest_signal'].notna()]
+                        if mask.all() and 'intervals' in df.attrs:
+                            intervals = list(df.attrs['intervals'])
+                        else:
+                            intervals = sorted(df['interval'][mask].unique())
+                        selected_intervals = st.multiselect("Filter by interval:", intervals, default=intervals, key=f"{filter_key}_{selected_file}")
+                        # Nothing to filter when every interval is selected
+                        if selected_intervals and len(selected_intervals) < len(intervals):
+                            mask &= df['interval'].isin(selected_intervals).to_numpy()
+                    
+                    if not mask.all():
+                        df = df[mask]
+                    if recent_signals:
                         df = df.sort_values(by='latest_signal', ascending=False)
-                        if 'interval' in df.columns:
-                            intervals = sorted(df['interval'].unique())
-                            selected_intervals = st.multiselect("Filter by interval:", intervals, default=intervals, key=f"mc_interval_filter_recent_{selected_file}")
-                            if selected_intervals:
-                                df = df[df['interval'].isin(selected_intervals)]
-                        mc_waikiki_aggrid_editor(df, 'good')
-                    else:
-                        st.info("No signal date information available in the results.")
-                else:
-                    st.info("No recent signals data available. Please run an analysis first.")
-
-            # Display interval details
-            with tabs[4]:
-                df, message = load_results('mc_eval_custom_detailed_', selected_file, 'avg_return_10')
-                if df is not None:
-                    if mc_waikiki_ticker_filter:
-                        df = df[df['ticker'].str.contains(mc_waikiki_ticker_filter, case=False)]
-                    
-                    if 'interval' in df.columns:
-                        intervals = sorted(df['interval'].unique())
-                        selected_intervals = st.multiselect("Filter by interval:", intervals, default=intervals, key=f"mc_interval_filter_details_{selected_file}")
-                        if selected_intervals:
-                            df = df[df['interval'].isin(selected_intervals)]
-                    mc_waikiki_aggrid_editor(df, 'details')
+                    mc_waikiki_aggrid_editor(df, tab_key)
                 else:
-                    st.info("No interval summary data available. Please run MC Signal Evaluation first.")
+                    st.info(empty_message)
+
+            # Table name -> render_mc_waikiki_table arguments
+            mc_waikiki_tables = {
+                # For MC, best means most negative returns
+                "Best Intervals (50)": ('mc_eval_best_intervals_50_', 'avg_return_10', '50', 'mc_interval_filter_best_50',
+                                        "No best intervals data available for 50-period analysis. Please run MC Signal Evaluation first."),
+                "Best Intervals (20)": ('mc_eval_best_intervals_20_', 'avg_return_10', '20', 'mc_interval_filter_best_20',
+                                        "No best intervals data available for 20-period analysis. Please run MC Signal Evaluation first."),
+                "Best Intervals (100)": ('mc_eval_best_intervals_100_', 'avg_return_10', '100', 'mc_interval_filter_best_100',
+                                         "No best intervals data available for 100-period analysis. Please run MC Signal Evaluation first."),
+                # Negative returns for MC
+                "High Return Intervals": ('mc_eval_good_signals_', 'latest_signal', 'good', 'mc_interval_filter_recent',
+                                          "No recent signals data available. Please run an analysis first."),
+                "Interval Details": ('mc_eval_custom_detailed_', 'avg_return_10', 'details', 'mc_interval_filter_details',
+                                     "No interval summary data available. Please run MC Signal Evaluation first."),
+            }
+
+            # st.tabs runs every tab body on each rerun; a horizontal radio renders only
+            # the chosen table, so the other four are neither loaded nor sent to AgGrid
+            mc_waikiki_table = st.radio("Table", list(mc_waikiki_tables), horizontal=True,
+                                        label_visibility="collapsed", key="mc_waikiki_table")
+            render_mc_waikiki_table(*mc_waikiki_tables[mc_waikiki_table],
+                                  recent_signals=(mc_waikiki_table == "High Return Intervals"))
 
         # Resonance Model section
         st.subheader("Resonance Model")
@@ -2734,30 +3029,41 @@ elif page == "MC Analysis (卖出)":
         # Add shared ticker filter for MC Resonance model
         mc_resonance_ticker_filter = st.text_input("Filter by ticker symbol:", key=f"mc_resonance_ticker_filter_{selected_file}")
         
-        # Helper for AgGrid in MC Resonance model
-        def mc_resonance_aggrid_editor(df, tab_key, selection_enabled=True):
-            if df is not None and not df.empty:
-                df = df.copy()
-                # To prevent ArrowTypeError from mixed types, convert object columns to string
-                for col in df.columns:
-                    if df[col].dtype == 'object':
-                        df[col] = df[col].astype(str)
+        # Grid options template per (schema, selection mode), shared read-only across
+        # the resonance tabs; the editor passes AgGrid a shallow copy
+        @st.cache_resource(max_entries=32)
+        def build_mc_resonance_grid_options(columns_tuple, selection_enabled):
+            df = pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in columns_tuple})
+
+            gb = GridOptionsBuilder.from_dataframe(df)
+            gb.configure_default_column(editable=False, filterable=True, sortable=True, resizable=True)
+            gb.configure_pagination(paginationAutoPageSize=True)
+            
+            if selection_enabled:
+                gb.configure_selection('single', use_checkbox=True, groupSelectsChildren=False, groupSelectsFiltered=False)
 
-                gb = GridOptionsBuilder.from_dataframe(df)
-                gb.configure_default_column(editable=False, filterable=True, sortable=True, resizable=True)
-                gb.configure_pagination(paginationAutoPageSize=True)
-                
-                if selection_enabled:
-                    gb.configure_selection('single', use_checkbox=True, groupSelectsChildren=False, groupSelectsFiltered=False)
+            if 'ticker' in df.columns:
+                gb.configure_column('ticker', pinned='left', minWidth=90)
+            if 'date' in df.columns:
+                gb.configure_column('date', minWidth=120)
+            if 'signal_date' in df.columns:
+                gb.configure_column('signal_date', minWidth=120)
 
-                if 'ticker' in df.columns:
-                    gb.configure_column('ticker', pinned='left', minWidth=90)
-                if 'date' in df.columns:
-                    gb.configure_column('date', minWidth=120)
-                if 'signal_date' in df.columns:
-                    gb.configure_column('signal_date', minWidth=120)
+            return gb.build()
 
-                grid_options = gb.build()
+        # Prepare the display frame once per distinct table, as for the Waikiki
+        # grids; reruns with the same rows skip the conversion
+        @st.cache_data(show_spinner=False, max_entries=32)
+        def prepare_mc_resonance_grid(df):
+            # To prevent ArrowTypeError from mixed types, convert object columns to string
+            return _arrow_safe_object_columns(df)
+
+        # Helper for AgGrid in MC Resonance model
+        def mc_resonance_aggrid_editor(df, tab_key, selection_enabled=True):
+            if df is not None and not df.empty:
+                df = prepare_mc_resonance_grid(df)
+                schema_key = tuple(zip(df.columns, df.dtypes.astype(str)))
+                grid_options = {**build_mc_resonance_grid_options(schema_key, selection_enabled)}
                 
                 ag_grid_params = {
                     'gridOptions': grid_options,
@@ -2779,9 +3085,101 @@ elif page == "MC Analysis (卖出)":
                     )
                     return grid_response
                 else:
-                    AgGrid(df, **ag_grid_params)
+                    # Read-only details grid: nothing to send back to Python
+                    AgGrid(
+                        df,
+                        data_return_mode=DataReturnMode.AS_INPUT,
+                        update_mode=GridUpdateMode.NO_UPDATE,
+                        **ag_grid_params
+                    )
                     return None
 
+        # Initialize session state for both MC resonance selections
+        if 'mc_resonance_1234_selected' not in st.session_state:
+            st.session_state.mc_resonance_1234_selected = pd.DataFrame()
+        if 'mc_resonance_5230_selected' not in st.session_state:
+            st.session_state.mc_resonance_5230_selected = pd.DataFrame()
+
+        # Resonance candidate and details tables render as fragments so their own
+        # filters only rerun the table; a new selection still reruns the whole app
+        # to refresh the plots below.
+        @st.fragment
+        def render_mc_resonance_candidates(model, other_model, nx_col, nx_label, nx_filter_key,
+                                           recent_days=None, bool_cols=(), default_selection=False):
+            file_pattern = f'mc_breakout_candidates_summary_{model}_'
+            if recent_days:
+                # Truncated to most recent days
+                df, message = load_recent_results(file_pattern, selected_file, 'date',
+                                                  days=recent_days, bool_cols=bool_cols)
+            else:
+                df, message = load_results(file_pattern, selected_file, 'date')
+            
+            if df is not None and model in message:
+                if mc_resonance_ticker_filter:
+                    df = df[df['ticker'].str.contains(mc_resonance_ticker_filter, case=False, regex=False, na=False)]
+                
+                # Add NX filtering if available
+                if nx_col in df.columns:
+                    nx_values = sorted(df[nx_col].unique())
+                    selected_nx = st.multiselect(f"Filter by {nx_label} Signal:", nx_values, 
+                                                 default=[False] if False in nx_values else nx_values,
+                                                 key=f"{nx_filter_key}_{selected_file}")
+                    if selected_nx:
+                        df = df[df[nx_col].isin(selected_nx)]
+                
+                df_sorted = df.sort_values(by='date', ascending=False)
+                grid_response = mc_resonance_aggrid_editor(df_sorted, f'summary_{model}')
+
+                # Default selection to the first candidate if none are selected
+                if (default_selection and not df_sorted.empty and
+                        st.session_state.mc_resonance_1234_selected.empty and st.session_state.mc_resonance_5230_selected.empty):
+                    st.session_state[f'mc_resonance_{model}_selected'] = df_sorted.head(1)
+
+                # If new selection is made in this grid; st_aggrid already returns the
+                # selection as a DataFrame, so only other payloads are converted
+                selected_df = grid_response['selected_rows'] if grid_response else None
+                if selected_df is not None and not isinstance(selected_df, pd.DataFrame):
+                    selected_df = pd.DataFrame(selected_df)
+                if selected_df is not None and not selected_df.empty:
+                    # Avoid rerun if selection hasn't changed; the selected row's (ticker, date)
+                    # identifies it, so the whole frame is not compared
+                    selected_sig = tuple(selected_df.iloc[0][[col for col in ('ticker', 'date') if col in selected_df.columns]])
+                    if selected_sig != st.session_state.get(f'mc_resonance_{model}_sig'):
+                        st.session_state[f'mc_resonance_{model}_selected'] = selected_df
+                        st.session_state[f'mc_resonance_{model}_sig'] = selected_sig
+                        st.session_state[f'mc_resonance_{other_model}_selected'] = pd.DataFrame()  # Clear other selection
+                        st.session_state[f'mc_resonance_{other_model}_sig'] = None
+                        st.rerun()
+            else:
+                st.info(f"No MC {model} breakout candidates found. Please run analysis first.")
+
+        @st.fragment
+        def render_mc_resonance_details(model, recent_days=None):
+            file_pattern = f'mc_breakout_candidates_details_{model}_'
+            if recent_days:
+                # Truncated to most recent days
+                df, message = load_recent_results(file_pattern, selected_file, 'signal_date', days=recent_days)
+            else:
+                df, message = load_results(file_pattern, selected_file, 'signal_date')
+            
+            if df is not None and model in message:
+                if mc_resonance_ticker_filter:
+                    df = df[df['ticker'].str.contains(mc_resonance_ticker_filter, case=False, regex=False, na=False)]
+                
+                if 'interval' in df.columns:
+                    intervals = sorted(df['interval'].unique())
+                    selected_intervals = st.multiselect("Filter by interval:", intervals, 
+                                                       default=intervals,
+                                                       key=f"mc_interval_filter_{model}_{selected_file}")
+                    if selected_intervals:
+                        df = df[df['interval'].isin(selected_intervals)]
+                
+                # Display the dataframe
+                mc_resonance_aggrid_editor(df.sort_values(by='signal_date', ascending=False), f'details_{model}', selection_enabled=False)
+                
+            else:
+                st.info(f"No MC {model} detailed results found. Please run analysis first.")
+
         # Create two columns for 1234 and 5230 data
         col_1234, col_5230 = st.columns([1, 1])
 
@@ -2792,84 +3190,12 @@ elif page == "MC Analysis (卖出)":
 
             # Display 1234 breakout candidates
             with tab_1234_candidates:
-                df, message = load_results('mc_breakout_candidates_summary_1234_', selected_file, 'date')
-                
-                if df is not None and '1234' in message:
-                    # Truncate to most recent 60 days
-                    if 'date' in df.columns:
-                        df['date'] = pd.to_datetime(df['date'])
-                        cutoff_date = pd.Timestamp.now() - pd.Timedelta(days=60)
-                        df = df[df['date'] >= cutoff_date]
-                        if 'nx_30m_signal' in df.columns:
-                            df['nx_30m_signal'] = df['nx_30m_signal'].astype(bool)
-                        df['date'] = df['date'].dt.strftime('%Y-%m-%d')
-
-                    if mc_resonance_ticker_filter:
-                        df = df[df['ticker'].str.contains(mc_resonance_ticker_filter, case=False)]
-                    
-                    # Add NX filtering if available
-                    nx_filters_applied = False
-                    if 'nx_1d_signal' in df.columns:
-                        nx_1d_values = sorted(df['nx_1d_signal'].unique())
-                        selected_nx_1d = st.multiselect("Filter by NX 1d Signal:", nx_1d_values, 
-                                                       default=[False] if False in nx_1d_values else nx_1d_values,
-                                                       key=f"mc_nx_1d_filter_1234_{selected_file}")
-                        if selected_nx_1d:
-                            df = df[df['nx_1d_signal'].isin(selected_nx_1d)]
-                            nx_filters_applied = True
-                    
-                    df_sorted = df.sort_values(by='date', ascending=False)
-                    grid_response = mc_resonance_aggrid_editor(df_sorted, 'summary_1234')
-
-                    # Initialize session state for both MC resonance selections
-                    if 'mc_resonance_1234_selected' not in st.session_state:
-                        st.session_state.mc_resonance_1234_selected = pd.DataFrame()
-                    if 'mc_resonance_5230_selected' not in st.session_state:
-                        st.session_state.mc_resonance_5230_selected = pd.DataFrame()
-
-                    # Default selection to the first candidate if none are selected
-                    if not df_sorted.empty and st.session_state.mc_resonance_1234_selected.empty and st.session_state.mc_resonance_5230_selected.empty:
-                        st.session_state.mc_resonance_1234_selected = df_sorted.head(1)
-
-                    # If new selection is made in this grid
-                    if grid_response and grid_response['selected_rows'] is not None and not pd.DataFrame(grid_response['selected_rows']).empty:
-                        selected_df = pd.DataFrame(grid_response['selected_rows'])
-                        # Avoid rerun if selection hasn't changed
-                        if not selected_df.equals(st.session_state.mc_resonance_1234_selected):
-                            st.session_state.mc_resonance_1234_selected = selected_df
-                            st.session_state.mc_resonance_5230_selected = pd.DataFrame()  # Clear other selection
-                            st.rerun()
-                else:
-                    st.info("No MC 1234 breakout candidates found. Please run analysis first.")
+                render_mc_resonance_candidates('1234', '5230', 'nx_1d_signal', 'NX 1d', 'mc_nx_1d_filter_1234',
+                                               recent_days=60, bool_cols=('nx_30m_signal',), default_selection=True)
 
             # Display 1234 detailed results
             with tab_1234_details:
-                df, message = load_results('mc_breakout_candidates_details_1234_', selected_file, 'signal_date')
-                
-                if df is not None and '1234' in message:
-                    # Truncate to most recent 60 days
-                    if 'signal_date' in df.columns:
-                        df['signal_date'] = pd.to_datetime(df['signal_date'])
-                        cutoff_date = pd.Timestamp.now() - pd.Timedelta(days=60)
-                        df = df[df['signal_date'] >= cutoff_date]
-                        df['signal_date'] = df['signal_date'].dt.strftime('%Y-%m-%d')
-
-                    if mc_resonance_ticker_filter:
-                        df = df[df['ticker'].str.contains(mc_resonance_ticker_filter, case=False)]
-                    
-                    if 'interval' in df.columns:
-                        intervals = sorted(df['interval'].unique())
-                        selected_intervals = st.multiselect("Filter by interval:", intervals, 
-                                                           default=intervals,
-                                                           key=f"mc_interval_filter_1234_{selected_file}")
-                        if selected_intervals:
-                            df = df[df['interval'].isin(selected_intervals)]
-                    
-                    # Display the dataframe
-                    mc_resonance_aggrid_editor(df.sort_values(by='signal_date', ascending=False), 'details_1234', selection_enabled=False)
-                    
-                else:
-                    st.info("No MC 1234 detailed results found. Please run analysis first.")
+                render_mc_resonance_details('1234', recent_days=60)
 
         # Right column: 5230 data
         with col_5230:
@@ -2878,56 +3204,11 @@ elif page == "MC Analysis (卖出)":
 
             # Display 5230 breakout candidates
             with tab_5230_candidates:
-                df, message = load_results('mc_breakout_candidates_summary_5230_', selected_file, 'date')
-                
-                if df is not None and '5230' in message:
-                    if mc_resonance_ticker_filter:
-                        df = df[df['ticker'].str.contains(mc_resonance_ticker_filter, case=False)]
-                    
-                    # Add NX filtering if available
-                    if 'nx_1h_signal' in df.columns:
-                        nx_values = sorted(df['nx_1h_signal'].unique())
-                        selected_nx = st.multiselect("Filter by NX 1h Signal:", nx_values, 
-                                                   default=[False] if False in nx_values else nx_values,
-                                                   key=f"mc_nx_filter_5230_{selected_file}")
-                        if selected_nx:
-                            df = df[df['nx_1h_signal'].isin(selected_nx)]
-                    
-                    # Display the dataframe
-                    grid_response = mc_resonance_aggrid_editor(df.sort_values(by='date', ascending=False), 'summary_5230')
-
-                    # If new selection is made in this grid
-                    if grid_response and grid_response['selected_rows'] is not None and not pd.DataFrame(grid_response['selected_rows']).empty:
-                        selected_df = pd.DataFrame(grid_response['selected_rows'])
-                        # Avoid rerun if selection hasn't changed
-                        if not selected_df.equals(st.session_state.mc_resonance_5230_selected):
-                            st.session_state.mc_resonance_5230_selected = selected_df
-                            st.session_state.mc_resonance_1234_selected = pd.DataFrame()  # Clear other selection
-                            st.rerun()
-                else:
-                    st.info("No MC 5230 breakout candidates found. Please run analysis first.")
+                render_mc_resonance_candidates('5230', '1234', 'nx_1h_signal', 'NX 1h', 'mc_nx_filter_5230')
 
             # Display 5230 detailed results
             with tab_5230_details:
-                df, message = load_results('mc_breakout_candidates_details_5230_', selected_file, 'signal_date')
-                
-                if df is not None and '5230' in message:
-                    if mc_resonance_ticker_filter:
-                        df = df[df['ticker'].str.contains(mc_resonance_ticker_filter, case=False)]
-                    
-                    if 'interval' in df.columns:
-                        intervals = sorted(df['interval'].unique())
-                        selected_intervals = st.multiselect("Filter by interval:", intervals, 
-                                                           default=intervals,
-                                                           key=f"mc_interval_filter_5230_{selected_file}")
-                        if selected_intervals:
-                            df = df[df['interval'].isin(selected_intervals)]
-                    
-                    # Display the dataframe
-                    mc_resonance_aggrid_editor(df.sort_values(by='signal_date', ascending=False), 'details_5230', selection_enabled=False)
-                    
-                else:
-                    st.info("No MC 5230 detailed results found. Please run analysis first.")
+                render_mc_resonance_details('5230')
 
 
         # Determine which selection to use for MC resonance
@@ -2943,9 +3224,6 @@ elif page == "MC Analysis (卖出)":
         if not mc_selected_candidates.empty:
             # Load detailed data from MC waikiki model
             mc_detailed_df, _ = load_results('mc_eval_custom_detailed_', selected_file)
-            
-            # Load returns distribution data for boxplots
-            mc_returns_df, _ = load_results('mc_eval_returns_distribution_', selected_file)
 
             if mc_detailed_df is None or mc_detailed_df.empty:
                 st.warning("Could not load detailed data for MC Waikiki model. Please run analysis to generate `mc_eval_custom_detailed` file.")
@@ -2973,394 +3251,19 @@ elif page == "MC Analysis (卖出)":
 
                     for i, interval in enumerate(intervals_to_plot):
                         with plot_cols[i]:
-                            # Filter data for this ticker and interval
-                            plot_data = mc_detailed_df[(mc_detailed_df['ticker'] == ticker) & (mc_detailed_df['interval'] == interval)]
+                            # Filter data for this ticker and interval; the cached row lookup returns
+                            # price/volume history already parsed
+                            plot_data = load_result_rows('mc_eval_custom_detailed_', selected_file, ticker, interval)
 
-                            if plot_data.empty:
+                            if plot_data is None or plot_data.empty:
                                 st.write(f"No detailed data for {ticker} ({interval})")
                                 continue
                             
-                            selected_ticker_data = plot_data.iloc[0]
+                            # Returns distribution rows for boxplot visualization, from the cached
+                            # (ticker, interval) index instead of a boolean scan of the whole file
+                            filtered_returns = load_result_rows('mc_eval_returns_distribution_', selected_file, ticker, interval)
 
-                            # Create figure with subplots: price on top, volume on bottom
-                            fig = make_subplots(
-                                rows=2, cols=1,
-                                subplot_titles=('Price Movement After MC Signal', 'Volume'),
-                                vertical_spacing=0.1,
-                                row_heights=[0.7, 0.3]
-                            )
-                            
-                            # Initialize variables for tracking last price point
-                            last_price_period = None
-                            last_price_value = None
-                            
-                            # Filter returns distribution data for boxplot visualization
-                            if mc_returns_df is not None and not mc_returns_df.empty:
-                                filtered_returns = mc_returns_df[
-                                    (mc_returns_df['ticker'] == ticker) &
-                                    (mc_returns_df['interval'] == interval)
-                                ]
-                                
-                                if not filtered_returns.empty:
-                                    # Get periods that have data
-                                    periods_with_data = sorted(filtered_returns['period'].unique())
-                                    
-                                    # Add boxplots for each period
-                                    median_price_values = []
-                                    median_periods = []
-                                    
-                                    # Add volume bars for each period
-                                    volume_periods = []
-                                    avg_volumes = []
-                                    
-                                    for period in periods_with_data:
-                                        period_data = filtered_returns[filtered_returns['period'] == period]
-                                        period_returns = period_data['return'].values
-                                        
-                                        if len(period_returns) > 0:
-                                            # Convert returns to relative price (baseline = 100)
-                                            relative_prices = 100 + period_returns
-                                            
-                                            # Add price boxplot
-                                            fig.add_trace(go.Box(
-                                                y=relative_prices,
-                                                x=[period] * len(relative_prices),
-                                                name=f'Period {period}',
-                                                boxpoints=False,  # Don't show individual points
-                                                showlegend=False,
-                                                marker=dict(color='lightgray'),
-                                                line=dict(color='lightgray')
-                                            ), row=1, col=1)
-                                            
-                                            # Store median for connecting line
-                                            median_price_values.append(100 + np.median(period_returns))
-                                            median_periods.append(period)
-                                        
-                                        # Add volume data if available
-                                        if 'volume' in period_data.columns:
-                                            period_volumes = period_data['volume'].values
-                                            if len(period_volumes) > 0:
-                                                avg_volume = np.mean(period_volumes[~np.isnan(period_volumes)])
-                                                volume_periods.append(period)
-                                                avg_volumes.append(avg_volume)
-                                    
-                                    # Add median price connection line
-                                    if len(median_price_values) > 1:
-                                        fig.add_trace(go.Scatter(
-                                            x=median_periods,
-                                            y=median_price_values,
-                                            mode='lines+markers',
-                                            line=dict(color='gray', width=1),
-                                            marker=dict(color='gray', size=6),
-                                            name='Median Returns',
-                                            showlegend=False
-                                        ), row=1, col=1)
-                                    
-                                    # Add volume bars (grey bars for average volumes)
-                                    if len(avg_volumes) > 0:
-                                        fig.add_trace(go.Bar(
-                                            x=volume_periods,
-                                            y=avg_volumes,
-                                            name='Average Volume',
-                                            marker_color='lightgray',
-                                            showlegend=False
-                                        ), row=2, col=1)
-                                else:
-                                    # Fallback to scatter plot
-                                    periods = [0] + list(range(1, 101))  # Full range from 0 to 100
-                                    stock_returns = [(0, 100)]  # Start with (0, 100)
-                                    for period in periods[1:]:  # Skip 0 as we already added it
-                                        if f'avg_return_{period}' in selected_ticker_data and pd.notna(selected_ticker_data[f'avg_return_{period}']):
-                                            stock_returns.append((period, 100 + selected_ticker_data[f'avg_return_{period}']))
-                                    
-                                    if len(stock_returns) > 1:
-                                        periods_x, returns_y = zip(*stock_returns)
-                                        fig.add_trace(go.Scatter(
-                                            x=periods_x,
-                                            y=returns_y,
-                                            mode='lines+markers',
-                                            line=dict(color='lightgray', width=1),
-                                            marker=dict(color='gray', size=6),
-                                            name=f"{ticker} ({interval})",
-                                        ), row=1, col=1)
-                                    
-                                    # Add volume bars for fallback case
-                                    volume_periods = []
-                                    avg_volumes = []
-                                    for period in periods[1:]:
-                                        if f'avg_volume_{period}' in selected_ticker_data:
-                                            volume_periods.append(period)
-                                            avg_volumes.append(selected_ticker_data[f'avg_volume_{period}'])
-                                    
-                                    if len(avg_volumes) > 0:
-                                        fig.add_trace(go.Bar(
-                                            x=volume_periods,
-                                            y=avg_volumes,
-                                            name='Average Volume',
-                                            marker_color='lightgray',
-                                            showlegend=False
-                                        ), row=2, col=1)
-                            else:
-                                # Fallback to scatter plot if no returns distribution data
-                                periods = [0] + list(range(1, 101))  # Full range from 0 to 100
-                                stock_returns = [(0, 100)]
-                                for period in periods[1:]:
-                                    if f'avg_return_{period}' in selected_ticker_data and pd.notna(selected_ticker_data[f'avg_return_{period}']):
-                                        stock_returns.append((period, 100 + selected_ticker_data[f'avg_return_{period}']))
-                                
-                                if len(stock_returns) > 1:
-                                    periods_x, returns_y = zip(*stock_returns)
-                                    fig.add_trace(go.Scatter(
-                                        x=periods_x,
-                                        y=returns_y,
-                                        mode='lines+markers',
-                                        line=dict(color='lightgray', width=1),
-                                        marker=dict(color='gray', size=6),
-                                        name=f"{ticker} ({interval})",
-                                    ), row=1, col=1)
-                                
-                                # Add volume bars
-                                volume_periods = []
-                                avg_volumes = []
-                                for period in periods[1:]:
-                                    if f'avg_volume_{period}' in selected_ticker_data:
-                                        volume_periods.append(period)
-                                        avg_volumes.append(selected_ticker_data[f'avg_volume_{period}'])
-                                
-                                if len(avg_volumes) > 0:
-                                    fig.add_trace(go.Bar(
-                                        x=volume_periods,
-                                        y=avg_volumes,
-                                        name='Average Volume',
-                                        marker_color='lightgray',
-                                        showlegend=False
-                                    ), row=2, col=1)
-                            
-                            # Add actual price history if available
-                            if 'price_history' in selected_ticker_data and selected_ticker_data['price_history']:
-                                price_history = selected_ticker_data['price_history']
-                                if isinstance(price_history, str):
-                                    # Handle case where price_history might be stored as string
-                                    try:
-                                        import ast
-                                        price_history = ast.literal_eval(str(price_history))
-                                    except Exception:
-                                        # If parsing fails, silently set to empty dict to avoid spam
-                                        price_history = {}
-                                
-                                if price_history and 0 in price_history and price_history[0] is not None:
-                                    entry_price = float(price_history[0])
-                                    price_periods = []
-                                    price_values = []
-                                    
-                                    # Collect price history points
-                                    for period in sorted(price_history.keys()):
-                                        if price_history[period] is not None and period >= 0:
-                                            try:
-                                                relative_price = (float(price_history[period]) / entry_price) * 100
-                                                price_periods.append(period)
-                                                price_values.append(relative_price)
-                                            except (ValueError, TypeError):
-                                                continue
-                                    
-                                    # Add price history line and dots
-                                    if len(price_periods) > 1:
-                                        fig.add_trace(go.Scatter(
-                                            x=price_periods,
-                                            y=price_values,
-                                            mode='lines+markers',
-                                            line=dict(color='red', width=1),
-                                            marker=dict(color='red', size=6),
-                                            name='Price History',
-                                            showlegend=True
-                                        ), row=1, col=1)
-                                    elif len(price_periods) == 1:
-                                        # Single point case
-                                        fig.add_trace(go.Scatter(
-                                            x=price_periods,
-                                            y=price_values,
-                                            mode='markers',
-                                            marker=dict(color='red', size=6),
-                                            name='Price History',
-                                            showlegend=True
-                                        ), row=1, col=1)
-                                    
-                                    # Store the last price history point for connecting to current price
-                                    if price_periods:
-                                        last_price_period = price_periods[-1]
-                                        last_price_value = price_values[-1]
-                            
-                            # Add actual volume history if available
-                            if 'volume_history' in selected_ticker_data and selected_ticker_data['volume_history']:
-                                volume_history = selected_ticker_data['volume_history']
-                                if isinstance(volume_history, str):
-                                    try:
-                                        import ast
-                                        volume_history = ast.literal_eval(str(volume_history))
-                                    except Exception:
-                                        # If parsing fails, silently set to empty dict to avoid spam
-                                        volume_history = {}
-                                
-                                if volume_history and 0 in volume_history and volume_history[0] is not None:
-                                    volume_periods = []
-                                    volume_values = []
-                                    
-                                    # Collect volume history points
-                                    for period in sorted(volume_history.keys()):
-                                        if volume_history[period] is not None and period >= 0:
-                                            try:
-                                                volume_periods.append(period)
-                                                volume_values.append(float(volume_history[period]))
-                                            except (ValueError, TypeError):
-                                                continue
-                                    
-                                    # Add volume history line (red lines for latest signal)
-                                    if len(volume_periods) > 1:
-                                        fig.add_trace(go.Scatter(
-                                            x=volume_periods,
-                                            y=volume_values,
-                                            mode='lines+markers',
-                                            line=dict(color='red', width=2),
-                                            marker=dict(color='red', size=6),
-                                            name='Latest Signal Volume',
-                                            showlegend=True
-                                        ), row=2, col=1)
-                                    elif len(volume_periods) == 1:
-                                        # Single point case
-                                        fig.add_trace(go.Scatter(
-                                            x=volume_periods,
-                                            y=volume_values,
-                                            mode='markers',
-                                            marker=dict(color='red', size=6),
-                                            name='Latest Signal Volume',
-                                            showlegend=True
-                                        ), row=2, col=1)
-                        
-                            # Add baseline reference line at y=100 (add after all traces for visibility)
-                            fig.add_hline(y=100, line_dash="dash", line_color="gray", line_width=1, 
-                                         annotation_text="Short Price (Baseline)", annotation_position="top right", row=1, col=1)
-                            
-                            # Find the first period with data (usually period 3)
-                            first_period = None
-                            first_value = None
-                            
-                            # Use continuous range for consistent visualization
-                            # Skip boxplot data check and use scatter plot data
-                            if False:  # Disable boxplot data check to force continuous range
-                                filtered_returns = mc_returns_df[
-                                    (mc_returns_df['ticker'] == ticker) &
-                                    (mc_returns_df['interval'] == interval)
-                                ]
-                                if not filtered_returns.empty:
-                                    periods_with_data = sorted(filtered_returns['period'].unique())
-                                    if periods_with_data:
-                                        first_period = periods_with_data[0]
-                                        period_returns = filtered_returns[filtered_returns['period'] == first_period]['return'].values
-                                        if len(period_returns) > 0:
-                                            first_value = 100 + np.median(period_returns)
-                            
-                            # If no boxplot data, use scatter plot data
-                            if first_period is None or first_value is None:
-                                periods = list(range(1, 101))  # Full range from 1 to 100
-                                for period in periods:
-                                    if f'avg_return_{period}' in selected_ticker_data and pd.notna(selected_ticker_data[f'avg_return_{period}']):
-                                        first_period = period
-                                        first_value = 100 + selected_ticker_data[f'avg_return_{period}']
-                                        break
-                            
-                            # Add connecting line if we found a first data point
-                            if first_period is not None and first_value is not None:
-                                fig.add_trace(go.Scatter(
-                                    x=[0, first_period],
-                                    y=[100, first_value],
-                                    mode='lines',
-                                    line=dict(color='gray', width=1),
-                                    name='Baseline Connection',
-                                    showlegend=False
-                                ), row=1, col=1)
-                            
-                            # Highlight best period (for MC signals, best means most negative return)
-                            min_return = float('inf')
-                            best_period = None
-                            periods = list(range(1, 101))  # Full range from 1 to 100
-                            for period in periods:
-                                if f'avg_return_{period}' in selected_ticker_data and pd.notna(selected_ticker_data[f'avg_return_{period}']):
-                                    if selected_ticker_data[f'avg_return_{period}'] < min_return:
-                                        min_return = selected_ticker_data[f'avg_return_{period}']
-                                        best_period = period
-                            
-                            title_html = (
-                                f"<span style='font-size:16px'><b>{ticker} ({interval})</b></span><br>"
-                            )
-                            if best_period is not None:
-                                 title_html += (f"<span style='font-size:10px'>best period: {best_period} | "
-                                f"return: {min_return:.2f}% | "
-                                f"success: {selected_ticker_data.get(f'success_rate_{best_period}', 0):.2f}  "
-                                f"test count: {selected_ticker_data.get(f'test_count_{best_period}', 0)}</span>")
-                            
-                            fig.update_layout(
-                                title=dict(text=title_html, 
-                                            x=0.5, 
-                                            font=dict(color='black'),
-                                            xanchor='center',
-                                            yanchor='top'),
-                                showlegend=False,
-                                height=400,  # Increased height for dual subplots
-                                plot_bgcolor='white',
-                                paper_bgcolor='white'
-                            )
-                            
-                            # Update axes for subplots with synchronized x-axis
-                            fig.update_xaxes(
-                                title_text="Period", 
-                                row=1, col=1,
-                                range=[-5, 105],  # Set consistent x-axis range
-                                showgrid=True,
-                                gridwidth=1,
-                                gridcolor='lightgray',
-                                showline=True,
-                                linewidth=1,
-                                linecolor='black',
-                                tickfont=dict(color='black'),
-                                title=dict(text="Period", font=dict(color='black'))
-                            )
-                            fig.update_xaxes(
-                                title_text="Period", 
-                                row=2, col=1,
-                                range=[-5, 105],  # Same x-axis range as top subplot
-                                showgrid=True,
-                                gridwidth=1,
-                                gridcolor='lightgray',
-                                showline=True,
-                                linewidth=1,
-                                linecolor='black',
-                                tickfont=dict(color='black'),
-                                title=dict(text="Period", font=dict(color='black'))
-                            )
-                            fig.update_yaxes(
-                                title_text="Relative Price (Baseline = 100)", 
-                                row=1, col=1,
-                                showgrid=True,
-                                gridwidth=1,
-                                gridcolor='lightgray',
-                                showline=True,
-                                linewidth=1,
-                                linecolor='black',
-                                tickfont=dict(color='black'),
-                                title=dict(text="Relative Price (Baseline = 100)", font=dict(color='black'))
-                            )
-                            fig.update_yaxes(
-                                title_text="Volume", 
-                                row=2, col=1,
-                                showgrid=True,
-                                gridwidth=1,
-                                gridcolor='lightgray',
-                                showline=True,
-                                linewidth=1,
-                                linecolor='black',
-                                tickfont=dict(color='black'),
-                                title=dict(text="Volume", font=dict(color='black'))
-                            )
+                            fig = _build_mc_ticker_chart(ticker, interval, tuple(plot_data.iloc[0].items()), filtered_returns)
                             
                             st.plotly_chart(fig, use_container_width=True)
 
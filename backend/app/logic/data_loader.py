@@ -1,10 +1,40 @@
 import pandas as pd
 import yfinance as yf
-from datetime import datetime
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 
 def load_stock_list(file_path):
     return pd.read_csv(file_path, sep='\t', header=None, names=['ticker'])['ticker'].tolist()
 
+def _truncation_cutoff(end_date, tz):
+    """
+    Exclusive upper bound for truncating an index in timezone tz to end_date:
+    midnight (in tz) of the day after end_date's date.
+    """
+    # Convert end_date to pandas Timestamp and handle timezone
+    end_date = pd.Timestamp(end_date)
+    
+    # Handle timezone-aware datetime indexes
+    if tz is not None:
+        # If data has timezone, convert end_date to the same timezone
+        # First convert to UTC, then to the data's timezone
+        end_date = end_date.tz_localize('UTC').tz_convert(tz)
+    
+    cutoff = pd.Timestamp(end_date.date() + timedelta(days=1))
+    if tz is not None:
+        cutoff = cutoff.tz_localize(tz)
+    return cutoff
+
+def _slice_before(data_frame, cutoff):
+    # On a sorted index this is one binary search instead of building a
+    # datetime.date object per row
+    if not data_frame.index.is_monotonic_increasing:
+        return data_frame[data_frame.index < cutoff]
+    return data_frame.iloc[:data_frame.index.searchsorted(cutoff, side='left')]
+
 def truncate_data_to_date(data_frame, end_date):
     """
     Truncate DataFrame to only include data up to the specified end_date.
@@ -22,20 +52,110 @@ def truncate_data_to_date(data_frame, end_date):
     if isinstance(end_date, str):
         end_date = datetime.strptime(end_date, '%Y-%m-%d')
     
-    # Convert end_date to pandas Timestamp and handle timezone
-    end_date = pd.Timestamp(end_date)
+    return _slice_before(data_frame, _truncation_cutoff(end_date, data_frame.index.tz))
+
+# yfinance interval/period for each base timeframe that is downloaded directly
+DOWNLOAD_INTERVALS = {
+    '1h': ('60m', '2y'),
+    '1d': ('1d', '2y'),
+}
+
+# Upper bound on concurrent single-ticker history requests in this process, so
+# threaded callers of download_stock_data do not flood Yahoo with connections
+MAX_CONCURRENT_DOWNLOADS = 32
+_download_slots = threading.BoundedSemaphore(MAX_CONCURRENT_DOWNLOADS)
+
+def _parse_end_date(end_date):
+    """Return end_date as a datetime, or None when no truncation should be applied."""
+    if isinstance(end_date, str):
+        try:
+            return datetime.strptime(end_date, '%Y-%m-%d')
+        except ValueError:
+            print(f"Invalid end_date format: {end_date}. No truncation will be applied.")
+            return None
+    return end_date
+
+def _finalize_stock_data(ticker, data_ticker, end_date):
+    """Truncate the downloaded base intervals to end_date and derive 2h/3h/4h from 1h."""
+    # Truncate data to end_date if backtesting mode is enabled
+    if end_date is not None:
+        print(f"Truncating data to {end_date.strftime('%Y-%m-%d')} for backtesting")
+        # The cutoff only depends on the index timezone, so resolve it once per timezone
+        cutoffs = {}
+        for interval_key in DOWNLOAD_INTERVALS:
+            if not data_ticker[interval_key].empty:
+                original_count = len(data_ticker[interval_key])
+                tz = data_ticker[interval_key].index.tz
+                if tz not in cutoffs:
+                    cutoffs[tz] = _truncation_cutoff(end_date, tz)
+                data_ticker[interval_key] = _slice_before(data_ticker[interval_key], cutoffs[tz])
+                if not data_ticker[interval_key].empty:
+                    print(f"Truncated {interval_key} data for {ticker}: {len(data_ticker[interval_key])}/{original_count} records up to {end_date.strftime('%Y-%m-%d')}")
     
-    # Handle timezone-aware datetime indexes
-    if data_frame.index.tz is not None:
-        # If data has timezone, convert end_date to the same timezone
-        # First convert to UTC, then to the data's timezone
-        end_date = end_date.tz_localize('UTC').tz_convert(data_frame.index.tz)
+    # Generate derived timeframes from base downloads
+    # Process 1h to create 2h, 3h, 4h
+    if not data_ticker['1h'].empty:
+        data_ticker.update(transform_1h_data_multi(data_ticker['1h'], ['2h', '3h', '4h']))
     
-    return data_frame[data_frame.index.date <= end_date.date()]
+    return data_ticker
+
+# On-disk cache of raw single-ticker downloads. A download for a backtest end_date
+# in the past already covers that date, so it is reused indefinitely; live
+# downloads (no end_date, or one that is not over yet) for LIVE_CACHE_TTL seconds
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "cache")
+LIVE_CACHE_TTL = 15 * 60
+
+def _cache_path(ticker, interval_key, end_date):
+    tag = end_date.strftime('%Y-%m-%d') if end_date is not None else 'live'
+    return os.path.join(CACHE_DIR, ticker, f"{interval_key}_{tag}.pkl")
+
+def _read_cached_history(cache_path, end_date):
+    """Return the cached DataFrame, or None when it is missing, stale or unreadable."""
+    try:
+        is_live = end_date is None or end_date.date() >= datetime.now().date()
+        if is_live and time.time() - os.path.getmtime(cache_path) > LIVE_CACHE_TTL:
+            return None
+        return pd.read_pickle(cache_path)
+    except Exception:
+        return None
+
+def _write_cached_history(cache_path, df):
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        # Write to a temporary file first so concurrent readers never see a partial file
+        tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        print(f"Error caching {cache_path}: {e}")
+
+def _download_history(ticker, interval_key, end_date=None):
+    """Download one base interval for a single ticker; empty DataFrame on failure."""
+    cache_path = _cache_path(ticker, interval_key, end_date)
+    df = _read_cached_history(cache_path, end_date)
+    if df is not None:
+        print(f"Loaded cached {interval_key} data for {ticker}")
+        return df
+
+    yf_interval, period = DOWNLOAD_INTERVALS[interval_key]
+    try:
+        with _download_slots:
+            df = yf.Ticker(ticker).history(interval=yf_interval, period=period)
+        if not df.empty:
+            print(f"Downloaded {interval_key} data for {ticker}")
+            _write_cached_history(cache_path, df)
+        else:
+            print(f"No {interval_key} data available for {ticker}")
+        return df
+    except Exception as e:
+        print(f"Error downloading {ticker} {interval_key} data: {e}")
+        return pd.DataFrame()
 
 def download_stock_data(ticker, end_date=None):
     """
-    Download stock data for all required intervals in a single function
+    Download stock data for all required intervals in a single function.
+    The base intervals are requested concurrently, so the wall time is that of
+    the slowest request rather than the sum of all of them.
     
     Args:
         ticker: Stock ticker symbol
@@ -47,90 +167,206 @@ def download_stock_data(ticker, end_date=None):
     """
     print(f"Downloading data for {ticker}...")
     
-    # Process end_date parameter for truncation
-    truncate_data = False
-    if end_date is not None:
-        truncate_data = True
-        if isinstance(end_date, str):
-            try:
-                end_date = datetime.strptime(end_date, '%Y-%m-%d')
-            except ValueError:
-                print(f"Invalid end_date format: {end_date}. No truncation will be applied.")
-                truncate_data = False
+    end_date = _parse_end_date(end_date)
     
-    data_ticker = {}
-    stock = yf.Ticker(ticker)
+    with ThreadPoolExecutor(max_workers=len(DOWNLOAD_INTERVALS)) as executor:
+        futures = {interval_key: executor.submit(_download_history, ticker, interval_key, end_date)
+                   for interval_key in DOWNLOAD_INTERVALS}
+        data_ticker = {interval_key: future.result() for interval_key, future in futures.items()}
     
-    try:
-        # Get 1-hour data for medium timeframes
-        data_ticker['1h'] = stock.history(interval='60m', period='2y')
-        if not data_ticker['1h'].empty:
-            print(f"Downloaded 1h data for {ticker}")
+    return _finalize_stock_data(ticker, data_ticker, end_date)
+
+class RateLimiter:
+    """Token bucket that lets at most `rate` calls per second through, with bursts up to `burst`."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available and consume it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def _download_batch(tickers, interval_key, end_date=None, limiter=None):
+    """
+    Fetch one base interval for several tickers with a single yf.download call.
+    Tickers found in the disk cache are not requested again, and the downloaded
+    ones are written back to it. With a limiter, one token is taken per ticker
+    requested before the batch is sent.
+    
+    Returns:
+        Dictionary mapping each ticker to its DataFrame (empty on failure)
+    """
+    frames = {}
+    missing = []
+    for ticker in tickers:
+        df = _read_cached_history(_cache_path(ticker, interval_key, end_date), end_date)
+        if df is not None:
+            frames[ticker] = df
         else:
-            print(f"No 1h data available for {ticker}")
-    except Exception as e:
-        print(f"Error downloading {ticker} 1h data: {e}")
-        data_ticker['1h'] = pd.DataFrame()
+            missing.append(ticker)
+    if not missing:
+        return frames
+    if limiter is not None:
+        for _ in missing:
+            limiter.acquire()
     
+    yf_interval, period = DOWNLOAD_INTERVALS[interval_key]
     try:
-        # Get daily data for long timeframes
-        data_ticker['1d'] = stock.history(interval='1d', period='2y')
-        if not data_ticker['1d'].empty:
-            print(f"Downloaded 1d data for {ticker}")
-        else:
-            print(f"No 1d data available for {ticker}")
+        # ignore_tz=False keeps the exchange-local timezone that Ticker.history returns
+        with _download_slots:
+            batch = yf.download(missing, interval=yf_interval, period=period, group_by='ticker',
+                                threads=True, progress=False, ignore_tz=False)
     except Exception as e:
-        print(f"Error downloading {ticker} 1d data: {e}")
-        data_ticker['1d'] = pd.DataFrame()
+        print(f"Error downloading {interval_key} data: {e}")
+        batch = pd.DataFrame()
     
-    # Truncate data to end_date if backtesting mode is enabled
-    if truncate_data:
-        print(f"Truncating data to {end_date.strftime('%Y-%m-%d')} for backtesting")
-        for interval_key in ['1h', '1d']:
-            if not data_ticker[interval_key].empty:
-                original_count = len(data_ticker[interval_key])
-                data_ticker[interval_key] = truncate_data_to_date(data_ticker[interval_key], end_date)
-                if not data_ticker[interval_key].empty:
-                    print(f"Truncated {interval_key} data for {ticker}: {len(data_ticker[interval_key])}/{original_count} records up to {end_date.strftime('%Y-%m-%d')}")
+    available = set(batch.columns.get_level_values(0)) if isinstance(batch.columns, pd.MultiIndex) else set()
+    for ticker in missing:
+        if ticker in available:
+            # Tickers share one index in the batch, so drop the rows this ticker has no bar for
+            df = batch.xs(ticker, axis=1, level=0).dropna(how='all')
+            df.columns.name = None
+        else:
+            df = pd.DataFrame()
+        frames[ticker] = df
+        if not df.empty:
+            print(f"Downloaded {interval_key} data for {ticker}")
+            _write_cached_history(_cache_path(ticker, interval_key, end_date), df)
+        else:
+            print(f"No {interval_key} data available for {ticker}")
+    return frames
+
+def download_all_stock_data(tickers, end_date=None):
+    """
+    Download stock data for all required intervals for several tickers at once.
+    Each base interval is fetched with a single batched yf.download call for the
+    tickers that are not in the disk cache yet and then split per ticker.
     
-    # Generate derived timeframes from base downloads
-    # Process 1h to create 2h, 3h, 4h
-    if not data_ticker['1h'].empty:
-        for interval in ['2h', '3h', '4h']:
-            data_ticker[interval] = transform_1h_data(data_ticker['1h'], interval)
+    Args:
+        tickers: List of stock ticker symbols
+        end_date: Optional end date for backtesting (format: 'YYYY-MM-DD' or datetime)
+                 If None, uses current date (no truncation)
     
-    return data_ticker
+    Returns:
+        Dictionary mapping each ticker to its dictionary of interval data
+    """
+    tickers = list(dict.fromkeys(tickers))
+    print(f"Downloading data for {', '.join(tickers)}...")
+    
+    end_date = _parse_end_date(end_date)
+    all_data = {ticker: {} for ticker in tickers}
+    
+    for interval_key in DOWNLOAD_INTERVALS:
+        frames = _download_batch(tickers, interval_key, end_date)
+        for ticker in tickers:
+            all_data[ticker][interval_key] = frames[ticker]
+    
+    for ticker, data_ticker in all_data.items():
+        _finalize_stock_data(ticker, data_ticker, end_date)
+    
+    return all_data
+
+# Tickers per batched request when prefetching a whole stock list, and the
+# number of ticker requests per second the prefetch may send to Yahoo
+PREFETCH_BATCH_SIZE = 100
+PREFETCH_RPS = 20
+
+def prefetch_stock_data(tickers, end_date=None, batch_size=PREFETCH_BATCH_SIZE, rps=PREFETCH_RPS):
+    """
+    Fill the disk cache for a list of tickers with batched downloads, so the
+    download_stock_data calls that follow (e.g. in analysis worker processes)
+    read from the cache instead of sending one request per ticker and interval.
+    Only the raw downloads are cached; nothing is returned.
+    
+    Args:
+        tickers: List of stock ticker symbols
+        end_date: Optional end date for backtesting (format: 'YYYY-MM-DD' or datetime)
+        batch_size: Number of tickers per yf.download call
+        rps: Maximum number of ticker requests per second, to stay within Yahoo's rate limits
+    """
+    tickers = list(dict.fromkeys(tickers))
+    print(f"Prefetching data for {len(tickers)} tickers...")
+    
+    end_date = _parse_end_date(end_date)
+    limiter = RateLimiter(rps)
+    for start in range(0, len(tickers), batch_size):
+        batch_tickers = tickers[start:start + batch_size]
+        for interval_key in DOWNLOAD_INTERVALS:
+            _download_batch(batch_tickers, interval_key, end_date, limiter=limiter)
+
+# How OHLCV bars combine when resampled to a coarser interval
+OHLCV_AGGREGATIONS = {
+    "Open":  "first",
+    "High":  "max",
+    "Low":   "min",
+    "Close": "last",
+    "Volume":"sum"
+}
+OHLC_COLUMNS = ["Open", "High", "Low", "Close"]
 
 def transform_1h_data(df_1h, new_interval = '2h'):
+    return transform_1h_data_multi(df_1h, [new_interval])[new_interval]
+
+def transform_1h_data_multi(df_1h, new_intervals):
+    """
+    Resample 1h bars into each of new_intervals (e.g. ['2h', '3h', '4h']).
+    The session filter, column selection and timezone handling are done once
+    and shared by all target intervals.
+    
+    Returns:
+        Dictionary mapping each interval to its resampled DataFrame
+    """
     if df_1h.empty:
-        return pd.DataFrame()
-    df_1h.index = pd.to_datetime(df_1h.index)
-    df_1h.sort_index(inplace=True)
+        return {interval: pd.DataFrame() for interval in new_intervals}
+    # yfinance already returns a sorted DatetimeIndex, so only convert/sort when needed
+    if not isinstance(df_1h.index, pd.DatetimeIndex):
+        df_1h.index = pd.to_datetime(df_1h.index)
+    if not df_1h.index.is_monotonic_increasing:
+        df_1h.sort_index(inplace=True)
 
-    df_1h = df_1h.between_time("09:30", "16:00")
+    # Session filter (09:30-16:00 inclusive) on integer seconds-of-day computed from
+    # the index fields, rather than comparing datetime.time objects row by row
+    idx = df_1h.index
+    second_of_day = idx.hour * 3600 + idx.minute * 60 + idx.second
+    session = (second_of_day >= 9 * 3600 + 30 * 60) & (second_of_day <= 16 * 3600)
+    df_1h = df_1h.loc[session, list(OHLCV_AGGREGATIONS)]
+    if df_1h.empty:
+        return {interval: pd.DataFrame() for interval in new_intervals}
 
-    grouped = df_1h.groupby(df_1h.index.date)
+    # One resample over the whole range instead of one per trading day. Bins are
+    # laid out on naive wall-clock time so every day starts a bin at 09:30 even
+    # across DST changes; the 2h/3h/4h rules divide 24h, so the bins of each day
+    # line up with those of a per-day resample anchored at 09:30
+    tz = df_1h.index.tz
+    if tz is not None:
+        df_1h = df_1h.tz_localize(None)
 
-    def resample_xh(daily_df):
-        return daily_df.resample(
-            rule=new_interval,
+    result = {}
+    for interval in new_intervals:
+        df_xh = df_1h.resample(
+            rule=interval,
             closed="left",
             label="left",
-            origin="start_day", 
+            origin="start_day",
             offset="9h30min"
-        ).agg({
-            "Open":  "first",
-            "High":  "max",
-            "Low":   "min",
-            "Close": "last",
-            "Volume":"sum"
-        })
-
-    df_xh_list = []
-    for date_key, daily_data in grouped:
-        bar_xh = resample_xh(daily_data)
-        bar_xh.dropna(subset=["Open","High","Low","Close"], how="any", inplace=True)
-        df_xh_list.append(bar_xh)
-
-    df_xh = pd.concat(df_xh_list).sort_index() if df_xh_list else pd.DataFrame()
-    return df_xh
+        ).agg(OHLCV_AGGREGATIONS)
+        # Bins that fall outside the session (nights, weekends, holidays) have no bars
+        df_xh = df_xh.dropna(subset=OHLC_COLUMNS, how="any")
+
+        if tz is not None:
+            df_xh = df_xh.tz_localize(tz)
+        result[interval] = df_xh
+    return result
@@ -1,10 +1,17 @@
 from sqlalchemy.orm import Session
-from app.db.database import SessionLocal
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.db.database import SessionLocal, engine
 from app.db.models import PriceBar, AnalysisRun, AnalysisResult
 from datetime import datetime, date
+from contextlib import contextmanager
 import pandas as pd
 import json
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 def get_db_session():
     """Helper to get a new session, useful for worker processes."""
     return SessionLocal()
@@ -17,74 +24,50 @@ def save_price_history(ticker: str, interval: str, df: pd.DataFrame):
     if df.empty:
         return
 
-    db = SessionLocal()
     try:
-        # Convert DataFrame to list of dictionaries
-        # Ensure timestamp is standard datetime
-        records = []
-        for index, row in df.iterrows():
-            # index is 'timestamp' usually
-            # Ensure index is datetime
-            ts = pd.to_datetime(index)
-            # If naive, perfect (market time). If aware, strip or convert?
-            # Backend logic earlier enforced naive ET.
-            if ts.tzinfo is not None:
-                ts = ts.tz_convert('America/New_York').tz_localize(None)
-                
-            record = {
-                "ticker": ticker,
-                "interval": interval,
-                "timestamp": ts,
-                "open": row.get('Open'),
-                "high": row.get('High'),
-                "low": row.get('Low'),
-                "close": row.get('Close'),
-                "volume": int(row.get('Volume', 0))
-            }
-            records.append(record)
-            
-        # Bulk Insert / Upsert
-        # SQLite doesn't support "ON CONFLICT UPDATE" in standard INSERT easily with ORM bulk_save_objects
-        # unless we use core insert().
-        # For simplicity and robustness, we can delete existing for this ticker/interval range or just merge.
-        # Merging one by one is slow.
-        # SQLite 3.24+ supports UPSERT. SQLAlchemy 1.2+ supports it via dialects.
-        
-        # Strategy: Delete existing for this ticker+interval (full replace) or merge.
-        # Since we usually download the full history required, full replace for the ticker/interval is safer/easier.
-        # BUT be careful not to delete mostly everything if we only downloaded a partial update?
-        # Usually we download 'max' or specific period. 
-        # Let's use merge for now or iterate.
-        # Optimization: Use core implementation for bulk upsert if speed is needed. 
-        
-        # Simple cleanup first (optional, maybe too aggressive if we want to append?)
-        # db.query(PriceBar).filter(PriceBar.ticker == ticker, PriceBar.interval == interval).delete()
-        
-        # Let's try bulk_save_objects used as upsert? No, it inserts.
-        # Let's use merge efficiently?
-        for r in records:
-            # merge checks PK
-            db.merge(PriceBar(**r))
-            
-        db.commit()
+        # Build all records in one vectorized pass: naive market-time timestamps
+        # (the backend stores naive ET), lower-case OHLCV columns, integer volume
+        bars = df[['Open', 'High', 'Low', 'Close']].copy()
+        bars.columns = ['open', 'high', 'low', 'close']
+        bars['volume'] = df['Volume'].fillna(0).astype('int64') if 'Volume' in df.columns else 0
+        timestamps = pd.to_datetime(df.index)
+        if timestamps.tz is not None:
+            timestamps = timestamps.tz_convert('America/New_York').tz_localize(None)
+        bars.insert(0, 'timestamp', timestamps.to_pydatetime())
+        records = bars.assign(ticker=ticker, interval=interval).to_dict(orient='records')
+
+        # Single executemany UPSERT keyed on the (ticker, interval, timestamp) primary key
+        # instead of one ORM merge (SELECT + INSERT/UPDATE) per bar
+        stmt = sqlite_insert(PriceBar.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['ticker', 'interval', 'timestamp'],
+            set_={column: stmt.excluded[column] for column in ('open', 'high', 'low', 'close', 'volume')}
+        )
+
+        # Core connection instead of an ORM session: nothing here needs identity
+        # tracking, and the transaction commits (or rolls back) on exit
+        with engine.begin() as conn:
+            conn.execute(stmt, records)
     except Exception as e:
-        db.rollback()
         print(f"Error saving price history for {ticker}: {e}")
-    finally:
-        db.close()
 
 def create_analysis_run(stock_list_name: str) -> int:
     """
     Create a new analysis run record and return its ID.
-    Enforces 'Keep Latest' policy by deleting all previous runs for this stock list.
+    Enforces 'Keep Latest' policy by deactivating all previous runs for this stock list;
+    purge_inactive_runs deletes them later.
     """
     db = SessionLocal()
     try:
-        # Cleanup previous runs for this stock list
+        # Deactivate previous runs for this stock list (a flag update instead of
+        # deleting the runs and their results up front)
         try:
-            db.query(AnalysisRun).filter(AnalysisRun.stock_list_name == stock_list_name).delete()
+            db.query(AnalysisRun).filter(
+                AnalysisRun.stock_list_name == stock_list_name,
+                AnalysisRun.is_active == True
+            ).update({AnalysisRun.is_active: False}, synchronize_session=False)
             db.commit()
-            print(f"Cleaned up previous runs for {stock_list_name}")
+            print(f"Deactivated previous runs for {stock_list_name}")
         except Exception as e:
             db.rollback()
             print(f"Error cleaning up previous runs: {e}")
@@ -98,6 +81,27 @@ def create_analysis_run(stock_list_name: str) -> int:
     finally:
         db.close()
 
+def purge_inactive_runs():
+    """Delete deactivated analysis runs and their results in one transaction."""
+    db = SessionLocal()
+    try:
+        inactive_ids = db.query(AnalysisRun.id).filter(AnalysisRun.is_active == False)
+        # Bulk deletes bypass the ORM cascade, so remove the results explicitly
+        results_deleted = db.query(AnalysisResult).filter(
+            AnalysisResult.run_id.in_(inactive_ids.scalar_subquery())
+        ).delete(synchronize_session=False)
+        runs_deleted = db.query(AnalysisRun).filter(
+            AnalysisRun.is_active == False
+        ).delete(synchronize_session=False)
+        db.commit()
+        if runs_deleted:
+            print(f"Purged {runs_deleted} inactive runs ({results_deleted} results)")
+    except Exception as e:
+        db.rollback()
+        print(f"Error purging inactive runs: {e}")
+    finally:
+        db.close()
+
 def update_analysis_run_status(run_id: int, status: str):
     """Update the status of an analysis run."""
     db = SessionLocal()
@@ -109,45 +113,115 @@ def update_analysis_run_status(run_id: int, status: str):
     finally:
         db.close()
 
+def _clean_nans(d):
+    """Recursively replace NaN/inf with None and dates with ISO strings."""
+    if isinstance(d, float) and (d != d or d == float('inf') or d == float('-inf')):
+        return None
+    if isinstance(d, dict):
+        return {k: _clean_nans(v) for k, v in d.items()}
+    if isinstance(d, list):
+        return [_clean_nans(v) for v in d]
+    if isinstance(d, (datetime, pd.Timestamp)):
+        return d.isoformat()
+    if hasattr(d, 'isoformat'): # Handle datetime.date
+        return d.isoformat()
+    return d
+
+def _orjson_default(obj):
+    # pd.Timestamp and other datetime subclasses are not serialized natively
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    raise TypeError
+
+def clean_for_json(data):
+    """
+    Sanitize data for a JSON column: NaN/inf become None and dates ISO strings.
+    With orjson available this is one native encode/decode round trip (orjson
+    already writes non-finite floats as null) instead of a Python-level walk.
+    """
+    if orjson is None:
+        return _clean_nans(data)
+    return orjson.loads(orjson.dumps(
+        data,
+        default=_orjson_default,
+        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    ))
+
+def _add_analysis_result(db: Session, run_id: int, ticker: str, interval: str, result_type: str, data: dict):
+    """Replace the result for this run/ticker/interval/type within the session (no commit)."""
+    clean_data = clean_for_json(data)
+
+    # Delete existing result for this run/ticker/type to prevent duplicates
+    db.query(AnalysisResult).filter(
+        AnalysisResult.run_id == run_id,
+        AnalysisResult.ticker == ticker,
+        AnalysisResult.interval == interval,
+        AnalysisResult.result_type == result_type
+    ).delete()
+
+    result = AnalysisResult(
+        run_id=run_id,
+        ticker=ticker,
+        interval=interval,
+        result_type=result_type,
+        data=clean_data
+    )
+    db.add(result)
+
 def save_analysis_result(run_id: int, ticker: str, interval: str, result_type: str, data: dict):
     """Save a generic analysis result."""
     db = SessionLocal()
     try:
-        # Sanitize data for JSON (handle primitives, remove NaNs)
-        def clean_nans(d):
-            if isinstance(d, float) and (d != d or d == float('inf') or d == float('-inf')):
-                return None
-            if isinstance(d, dict):
-                return {k: clean_nans(v) for k, v in d.items()}
-            if isinstance(d, list):
-                return [clean_nans(v) for v in d]
-            if isinstance(d, (datetime, pd.Timestamp)):
-                return d.isoformat()
-            if hasattr(d, 'isoformat'): # Handle datetime.date
-                return d.isoformat()
-            return d
-
-        clean_data = clean_nans(data)
-
-        # Delete existing result for this run/ticker/type to prevent duplicates
-        db.query(AnalysisResult).filter(
-            AnalysisResult.run_id == run_id,
-            AnalysisResult.ticker == ticker,
-            AnalysisResult.interval == interval,
-            AnalysisResult.result_type == result_type
-        ).delete()
-
-        result = AnalysisResult(
-            run_id=run_id,
-            ticker=ticker,
-            interval=interval,
-            result_type=result_type,
-            data=clean_data
-        )
-        db.add(result)
+        _add_analysis_result(db, run_id, ticker, interval, result_type, data)
         db.commit()
     except Exception as e:
         db.rollback()
         print(f"Error saving analysis result {result_type} for {ticker}: {e}")
     finally:
         db.close()
+
+class AnalysisResultWriter:
+    """Collects analysis results in one session; see analysis_writer."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def save(self, run_id: int, ticker: str, interval: str, result_type: str, data: dict):
+        """
+        Same as save_analysis_result, but committed when the writer exits.
+        Like save_analysis_result, a result that fails (e.g. a payload that
+        cannot be cleaned for JSON) is printed and skipped; the others are kept.
+        """
+        try:
+            # The session does not autoflush, so flush earlier saves first; otherwise
+            # the delete in _add_analysis_result misses a result saved twice by this writer
+            self.db.flush()
+            _add_analysis_result(self.db, run_id, ticker, interval, result_type, data)
+        except Exception as e:
+            print(f"Error saving analysis result {result_type} for {ticker}: {e}")
+
+@contextmanager
+def analysis_writer():
+    """
+    Save many analysis results with one session and a single commit:
+
+        with analysis_writer() as writer:
+            for ...:
+                writer.save(run_id, ticker, interval, result_type, data)
+
+    A failing save only skips that result. If the final commit fails, the
+    pending results are rolled back and the error is printed, not raised.
+    """
+    db = SessionLocal()
+    try:
+        yield AnalysisResultWriter(db)
+        try:
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Error committing analysis results: {e}")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
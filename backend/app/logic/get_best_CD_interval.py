@@ -3,6 +3,8 @@ import numpy as np
 from data_loader import download_stock_data
 from indicators import compute_cd_indicator, compute_mc_indicator
 import yfinance as yf
+import time
+from collections import OrderedDict
 
 # EMA warmup period - should match the value in indicators.py
 EMA_WARMUP_PERIOD = 0
@@ -10,6 +12,64 @@ EMA_WARMUP_PERIOD = 0
 # Maximum number of latest signals to process (to reduce noise from older signals)
 MAX_SIGNALS_THRESHOLD = 7
 
+# In-process LRU cache for the downloads evaluate_interval falls back to when it
+# is called without pre-downloaded data: (ticker, kind) -> (expires_at, value).
+# Bounded so a long-lived process does not keep every ticker it has ever seen
+_download_cache = OrderedDict()
+DOWNLOAD_CACHE_MAX_ENTRIES = 32
+DAILY_CACHE_TTL = 24 * 60 * 60  # seconds
+INTRADAY_CACHE_TTL = 5 * 60  # seconds
+
+def _cached_download(key, ttl, fetch):
+    """Return fetch() for key, reusing the previous result while it is younger than ttl seconds."""
+    now = time.monotonic()
+    entry = _download_cache.get(key)
+    if entry is not None and now < entry[0]:
+        _download_cache.move_to_end(key)
+        return entry[1]
+    value = fetch()
+    _download_cache[key] = (now + ttl, value)
+    _download_cache.move_to_end(key)
+    # Drop expired entries, then the least recently used ones beyond the limit
+    for cached_key in [k for k, (expires_at, _) in _download_cache.items() if expires_at <= now]:
+        del _download_cache[cached_key]
+    while len(_download_cache) > DOWNLOAD_CACHE_MAX_ENTRIES:
+        _download_cache.popitem(last=False)
+    return value
+
+def fetch_daily_history(ticker):
+    """One year of daily bars for ticker, cached for DAILY_CACHE_TTL."""
+    return _cached_download((ticker, '1d'), DAILY_CACHE_TTL,
+                            lambda: yf.Ticker(ticker).history(interval='1d', period='1y'))
+
+def fetch_intraday_data(ticker):
+    """download_stock_data(ticker) for the intraday intervals, cached for INTRADAY_CACHE_TTL."""
+    return _cached_download((ticker, 'intraday'), INTRADAY_CACHE_TTL,
+                            lambda: download_stock_data(ticker, end_date=None))
+
+def compute_nx_series(df_nx):
+    """
+    Compute the NX trend (24-period EMA of Close above the 89-period EMA) for each bar.
+    
+    Args:
+        df_nx: DataFrame with price data
+    
+    Returns:
+        Boolean Series, or None if there are fewer than 89 periods for the long EMA
+    """
+    if df_nx is None or df_nx.empty or len(df_nx) < 89:
+        return None
+    close = df_nx['Close']
+    short_close = close.ewm(span=24, adjust=False).mean()
+    long_close = close.ewm(span=89, adjust=False).mean()
+    return short_close > long_close
+
+def signal_mask(signals):
+    """Boolean numpy mask of an indicator Series, treating NaN as no signal."""
+    if isinstance(signals, np.ndarray) and signals.dtype == bool:
+        return signals
+    return signals.to_numpy(dtype=bool, na_value=False)
+
 def find_latest_mc_signal_before_cd(data, cd_date, mc_signals):
     """
     Find the latest MC signal that occurred before a given CD signal date.
@@ -17,15 +77,13 @@ def find_latest_mc_signal_before_cd(data, cd_date, mc_signals):
     Args:
         data: DataFrame with price data
         cd_date: Date of the CD signal
-        mc_signals: Series with MC signals (boolean)
+        mc_signals: Boolean numpy mask of MC signals aligned with data (see signal_mask)
     
     Returns:
         Tuple of (mc_signal_date, mc_signal_price) or (None, None) if no MC signal found
     """
     # Get all MC signal dates before the CD signal date
-    # Handle NaN values by replacing them with False for boolean indexing
-    mc_signals_bool = mc_signals.fillna(False).infer_objects(copy=False)
-    mc_signal_dates = data.index[mc_signals_bool]
+    mc_signal_dates = data.index[mc_signals]
     previous_mc_signals = mc_signal_dates[mc_signal_dates < cd_date]
     
     if len(previous_mc_signals) == 0:
@@ -51,8 +109,8 @@ def evaluate_mc_at_top_price(data, mc_date, mc_price, cd_date):
         Dictionary with evaluation metrics
     """
     try:
-        mc_idx = data.index.get_loc(mc_date)
-        cd_idx = data.index.get_loc(cd_date)
+        # Both positions from one binary search on the sorted index
+        mc_idx, cd_idx = data.index.searchsorted([mc_date, cd_date])
         
         # 1. Calculate lookback range: from EMA warmup period to latest CD time point
         # Exclude unreliable early periods before EMA convergence
@@ -106,7 +164,7 @@ def evaluate_mc_at_top_price(data, mc_date, mc_price, cd_date):
         if not window_data.empty and len(window_data) > 1:
             # Use relative ranking instead of fixed percentage
             window_highs = window_data['High'].values
-            mc_rank = sum(mc_price >= h for h in window_highs) / len(window_highs)
+            mc_rank = np.count_nonzero(mc_price >= window_highs) / len(window_highs)
             
             # MC signal is local max if it's in top 30% of surrounding prices
             is_local_max = mc_rank >= 0.7
@@ -144,7 +202,7 @@ def calculate_returns(data, cd_signals, periods=None, max_signals=MAX_SIGNALS_TH
     
     Args:
         data: DataFrame with price data
-        cd_signals: Series with CD signals (boolean)
+        cd_signals: Series or boolean numpy mask with CD signals
         periods: List of periods to calculate returns for (default: 0 to 100)
         max_signals: Maximum number of latest signals to process (default: MAX_SIGNALS_THRESHOLD)
     
@@ -154,38 +212,42 @@ def calculate_returns(data, cd_signals, periods=None, max_signals=MAX_SIGNALS_TH
     if periods is None:
         periods = [0] + list(range(1, 101))  # Full range from 0 to 100
     results = []
-    # Handle NaN values by replacing them with False for boolean indexing
-    cd_signals_bool = cd_signals.fillna(False).infer_objects(copy=False)
-    signal_dates = data.index[cd_signals_bool]
+    signal_dates = data.index[signal_mask(cd_signals)]
     
     # Limit to the latest N signals to reduce noise from older signals
     if len(signal_dates) > max_signals:
         signal_dates = signal_dates[-max_signals:]
     
-    # Also compute MC signals for analysis
-    mc_signals = compute_mc_indicator(data)
+    # Skip signals that are too close to the end of the data
+    # One batched binary search on the sorted index for all signal positions
+    signal_positions = data.index.searchsorted(signal_dates)
+    keep = signal_positions + max(periods) < len(data)
+    signal_dates = signal_dates[keep]
+    signal_positions = signal_positions[keep]
+    if len(signal_dates) == 0:
+        return pd.DataFrame()
     
-    for date in signal_dates:
-        idx = data.index.get_loc(date)
-        
-        # Skip signals that are too close to the end of the data
-        if idx + max(periods) >= len(data):
-            continue
-            
-        entry_price = data.loc[date, 'Close']
-        entry_volume = data.loc[date, 'Volume']
-        returns = {}
-        volumes = {}
-        
-        for period in periods:
-            if idx + period < len(data):
-                exit_price = data.iloc[idx + period]['Close']
-                exit_volume = data.iloc[idx + period]['Volume']
-                returns[f'return_{period}'] = round(float((exit_price - entry_price) / entry_price * 100), 2)  # Convert to Python float
-                volumes[f'volume_{period}'] = round(int(exit_volume), 0)  # Convert to Python int
-            else:
-                returns[f'return_{period}'] = np.nan
-                volumes[f'volume_{period}'] = np.nan
+    # Also compute MC signals for analysis (only needed once a signal is evaluated)
+    mc_signals = signal_mask(compute_mc_indicator(data))
+    
+    # Gather the exit prices/volumes of every signal and period in one fancy-indexing
+    # step: row i holds positions signal_positions[i] + periods
+    close = data['Close'].to_numpy(dtype=float)
+    volume = data['Volume'].to_numpy()
+    gather = signal_positions[:, None] + np.asarray(periods)[None, :]
+    entry_prices = close[signal_positions][:, None]
+    returns_matrix = np.round((close[gather] - entry_prices) / entry_prices * 100, 2)
+    # Kept as float: a missing Volume bar stays NaN (an int cast would turn it into
+    # INT64_MIN) and is skipped by the per-period volume lists and averages
+    volumes_matrix = volume[gather].astype(float)
+    return_columns = [f'return_{period}' for period in periods]
+    volume_columns = [f'volume_{period}' for period in periods]
+    
+    for i, date in enumerate(signal_dates):
+        entry_volume = volume[signal_positions[i]]
+        # tolist() converts to Python floats/ints
+        returns = dict(zip(return_columns, returns_matrix[i].tolist()))
+        volumes = dict(zip(volume_columns, volumes_matrix[i].tolist()))
         
         # Find the latest MC signal before this CD signal
         latest_mc_date, latest_mc_price = find_latest_mc_signal_before_cd(data, date, mc_signals)
@@ -240,8 +302,7 @@ def evaluate_interval(ticker, interval, data=None):
                 if data and '1d' in data and not data['1d'].empty:
                     daily_data = data['1d']
                 else:
-                    stock = yf.Ticker(ticker)
-                    daily_data = stock.history(interval='1d', period='1y')
+                    daily_data = fetch_daily_history(ticker)
                     
                 if daily_data.empty:
                     return None
@@ -256,25 +317,30 @@ def evaluate_interval(ticker, interval, data=None):
                 })
             # Get data based on interval type
             elif interval in ['5m', '10m', '15m', '30m', '1h', '2h', '3h', '4h']:
-                data_ticker = download_stock_data(ticker, end_date=None)
+                data_ticker = fetch_intraday_data(ticker)
                 data_frame = data_ticker[interval]
             elif interval == '1d':
-                stock = yf.Ticker(ticker)
-                data_frame = stock.history(interval='1d', period='1y')
+                data_frame = fetch_daily_history(ticker)
             else:
                 return None
                 
         if data_frame.empty:
             return None
+        
+        # NX series per timeframe, computed at most once and shared by the signal
+        # and current NX lookups
+        nx_cache = {}
+        def get_nx_series(timeframe):
+            if timeframe not in nx_cache:
+                nx_cache[timeframe] = compute_nx_series(data.get(timeframe)) if data else None
+            return nx_cache[timeframe]
             
         # Compute CD signals
-        cd_signals = compute_cd_indicator(data_frame)
-        # Handle NaN values for signal count calculation
-        signal_count = cd_signals.fillna(False).infer_objects(copy=False).sum()
+        # NaN counts as no signal; the mask is shared with calculate_returns
+        cd_signals_bool = signal_mask(compute_cd_indicator(data_frame))
+        signal_count = int(np.count_nonzero(cd_signals_bool))
         
         # Get the latest signal date
-        # Handle NaN values by replacing them with False for boolean indexing
-        cd_signals_bool = cd_signals.fillna(False).infer_objects(copy=False)
         latest_signal_date = data_frame.index[cd_signals_bool].max() if signal_count > 0 else None
         latest_signal_str = latest_signal_date.strftime('%Y-%m-%d %H:%M:%S') if latest_signal_date else None
         latest_signal_price = round(float(data_frame.loc[latest_signal_date, 'Close']), 2) if latest_signal_date is not None else None  # Convert to Python float
@@ -332,21 +398,15 @@ def evaluate_interval(ticker, interval, data=None):
             result['nx_4h'] = None
             
             # Calculate current NX values using pre-downloaded data
-            if data:
-                for timeframe in ['1d', '1h', '4h']:
-                    if timeframe in data and not data[timeframe].empty:
-                        df_nx = data[timeframe]
-                        if len(df_nx) >= 89:  # Need at least 89 periods for long EMA
-                            close = df_nx['Close']
-                            short_close = close.ewm(span=24, adjust=False).mean()
-                            long_close = close.ewm(span=89, adjust=False).mean()
-                            current_nx = short_close.iloc[-1] > long_close.iloc[-1]
-                            result[f'nx_{timeframe}'] = bool(current_nx)
+            for timeframe in ['1d', '1h', '4h']:
+                nx_series = get_nx_series(timeframe)
+                if nx_series is not None:  # Need at least 89 periods for long EMA
+                    result[f'nx_{timeframe}'] = bool(nx_series.iloc[-1])
             
             return result
             
         # Calculate returns for each signal (limit to latest signals to reduce noise)
-        returns_df = calculate_returns(data_frame, cd_signals, max_signals=MAX_SIGNALS_THRESHOLD)
+        returns_df = calculate_returns(data_frame, cd_signals_bool, max_signals=MAX_SIGNALS_THRESHOLD)
         
         if returns_df.empty:
             result = {
@@ -406,7 +466,7 @@ def evaluate_interval(ticker, interval, data=None):
         # Calculate current period if there's a latest signal
         if latest_signal_date:
             # Find the index of the latest signal and current time
-            signal_idx = data_frame.index.get_loc(latest_signal_date)
+            signal_idx = int(data_frame.index.searchsorted(latest_signal_date))
             current_idx = len(data_frame) - 1
             # Calculate current period as the number of data points between signal and current time
             current_period = current_idx - signal_idx
@@ -442,32 +502,33 @@ def evaluate_interval(ticker, interval, data=None):
         result['price_history'] = price_history
         result['volume_history'] = volume_history
         
-        # Calculate metrics for each period dynamically
-        for period in periods:
-            return_col = f'return_{period}'
-            volume_col = f'volume_{period}'
-            if return_col in returns_df:
-                # Get individual returns and volumes (excluding NaN values)
-                individual_returns = [round(float(x), 2) for x in returns_df[return_col].dropna().tolist()]  # Convert to Python float
-                individual_volumes = [round(int(x), 0) for x in returns_df[volume_col].dropna().tolist()] if volume_col in returns_df else []  # Convert to Python int
-                test_count = len(individual_returns)
-                success_rate = round(float((pd.Series(returns_df[return_col].dropna()) > 0).mean() * 100), 2)  # Convert to Python float
-                avg_return = round(float(pd.Series(returns_df[return_col].dropna()).mean()), 2) if test_count > 0 else 0  # Convert to Python float
-                avg_volume = round(int(pd.Series(returns_df[volume_col].dropna()).mean()), 0) if volume_col in returns_df and len(returns_df[volume_col].dropna()) > 0 else 0  # Convert to Python int
-            else:
-                individual_returns = []
-                individual_volumes = []
-                test_count = 0
-                success_rate = 0
-                avg_return = 0
-                avg_volume = 0
-            
+        # Calculate metrics for every period in one vectorized pass over the
+        # signal x period return/volume blocks (missing columns become all-NaN)
+        return_frame = returns_df.reindex(columns=[f'return_{period}' for period in periods])
+        return_matrix = return_frame.to_numpy(dtype=float)
+        volume_matrix = returns_df.reindex(columns=[f'volume_{period}' for period in periods]).to_numpy(dtype=float)
+        return_valid = ~np.isnan(return_matrix)
+        volume_valid = ~np.isnan(volume_matrix)
+        test_counts = return_valid.sum(axis=0)
+        volume_counts = volume_valid.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            success_rates = (return_matrix > 0).sum(axis=0) / test_counts * 100
+            # Average only over the bars that have a volume
+            avg_volumes = np.nansum(volume_matrix, axis=0) / volume_counts
+        # Per-column pandas mean and Python round, as the per-period loop used, so
+        # values near a rounding tie come out the same
+        avg_returns = return_frame.mean().to_numpy()
+        
+        for i, period in enumerate(periods):
+            test_count = int(test_counts[i])
             result[f'test_count_{period}'] = test_count
-            result[f'success_rate_{period}'] = success_rate
-            result[f'avg_return_{period}'] = avg_return
-            result[f'avg_volume_{period}'] = avg_volume
-            result[f'returns_{period}'] = individual_returns  # Store individual returns for boxplot
-            result[f'volumes_{period}'] = individual_volumes  # Store individual volumes for volume chart
+            result[f'success_rate_{period}'] = round(float(success_rates[i]), 2) if test_count > 0 else 0
+            result[f'avg_return_{period}'] = round(float(avg_returns[i]), 2) if test_count > 0 else 0
+            result[f'avg_volume_{period}'] = int(avg_volumes[i]) if volume_counts[i] > 0 else 0
+            # Individual returns/volumes (excluding NaN values) for the boxplot and volume chart;
+            # tolist() converts to Python floats/ints
+            result[f'returns_{period}'] = [round(x, 2) for x in return_matrix[return_valid[:, i], i].tolist()]
+            result[f'volumes_{period}'] = volume_matrix[volume_valid[:, i], i].astype(np.int64).tolist()
         
         # Add MC signal analysis summary to the result
         if not returns_df.empty:
@@ -546,49 +607,37 @@ def evaluate_interval(ticker, interval, data=None):
         
         if latest_signal_date and data:
              for timeframe in ['1d', '1h']:
-                if timeframe in data and not data[timeframe].empty:
+                nx_series = get_nx_series(timeframe)
+                if nx_series is not None:
                     df_nx = data[timeframe]
-                    if len(df_nx) >= 89:
-                        # Calculate EMAs
-                        close = df_nx['Close']
-                        short_close = close.ewm(span=24, adjust=False).mean()
-                        long_close = close.ewm(span=89, adjust=False).mean()
-                        nx_series = short_close > long_close
+                    
+                    # Find value at signal date
+                    # Use asof to find the latest valid index up to signal_date
+                    try:
+                        # Note: yfinance 1d data is usually indexed at 00:00:00 (start of day)
+                        # If signal is 14:30:00, asof(14:30) might match today's 00:00 if present.
+                        # However, today's 1d bar is only complete at close. 
+                        # If we are "backtesting", we theoretically shouldn't know Close of today at 14:30.
+                        # But often for 1d trend we check "Yesterday's Close" or "Current Live".
+                        # Here we use simplest approach: lookup nearest past/present timestamp.
                         
-                        # Find value at signal date
-                        # Use asof to find the latest valid index up to signal_date
-                        try:
-                            # Note: yfinance 1d data is usually indexed at 00:00:00 (start of day)
-                            # If signal is 14:30:00, asof(14:30) might match today's 00:00 if present.
-                            # However, today's 1d bar is only complete at close. 
-                            # If we are "backtesting", we theoretically shouldn't know Close of today at 14:30.
-                            # But often for 1d trend we check "Yesterday's Close" or "Current Live".
-                            # Here we use simplest approach: lookup nearest past/present timestamp.
-                            
-                            idx_loc = df_nx.index.get_indexer([latest_signal_date], method='pad')[0]
-                            if idx_loc != -1:
-                                val = bool(nx_series.iloc[idx_loc])
-                                result[f'nx_{timeframe}_signal'] = val
-                        except Exception as e:
-                            print(f"Error calculating nx_{timeframe}_signal for {ticker}: {e}")
+                        idx_loc = df_nx.index.get_indexer([latest_signal_date], method='pad')[0]
+                        if idx_loc != -1:
+                            val = bool(nx_series.iloc[idx_loc])
+                            result[f'nx_{timeframe}_signal'] = val
+                    except Exception as e:
+                        print(f"Error calculating nx_{timeframe}_signal for {ticker}: {e}")
 
         # Current NX values (at current time)
         result['nx_1d'] = None
         result['nx_1h'] = None
         result['nx_4h'] = None
         
-        # Calculate current NX values using pre-downloaded data
-        if data:
-            # Calculate NX for different timeframes
-            for timeframe in ['1d', '1h', '4h']:
-                if timeframe in data and not data[timeframe].empty:
-                    df_nx = data[timeframe]
-                    if len(df_nx) >= 89:  # Need at least 89 periods for long EMA
-                        close = df_nx['Close']
-                        short_close = close.ewm(span=24, adjust=False).mean()
-                        long_close = close.ewm(span=89, adjust=False).mean()
-                        current_nx = short_close.iloc[-1] > long_close.iloc[-1]
-                        result[f'nx_{timeframe}'] = bool(current_nx)
+        # Calculate current NX values using pre-downloaded data (reusing the signal NX series)
+        for timeframe in ['1d', '1h', '4h']:
+            nx_series = get_nx_series(timeframe)
+            if nx_series is not None:  # Need at least 89 periods for long EMA
+                result[f'nx_{timeframe}'] = bool(nx_series.iloc[-1])
         
         # For signal NX values, we would need the signal date to calculate NX at that time
         # This is more complex and would require storing historical NX calculations
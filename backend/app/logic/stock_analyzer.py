@@ -10,12 +10,14 @@ import logging
 # Setup logger
 logger = logging.getLogger(__name__)
 
-from data_loader import load_stock_list, download_stock_data
+from data_loader import load_stock_list, download_stock_data, prefetch_stock_data
 from app.logic.db_utils import (
     save_price_history,
     create_analysis_run,
     update_analysis_run_status,
-    save_analysis_result
+    save_analysis_result,
+    analysis_writer,
+    purge_inactive_runs
 )
 from app.logic.utils import (
     calculate_current_nx_values,
@@ -237,6 +239,13 @@ def analyze_stocks(file_path, end_date=None, progress_callback=None):
         update_analysis_run_status(run_id, "failed")
         return
 
+    # Download the raw price history in batched requests up front; the workers'
+    # download_stock_data calls then read it from the disk cache
+    try:
+        prefetch_stock_data(tickers, end_date=end_date)
+    except Exception as e:
+        logger.warning(f"Prefetch failed, falling back to per-ticker downloads: {e}")
+    
     # Process tickers
     results = []
     
@@ -620,6 +629,9 @@ def analyze_stocks(file_path, end_date=None, progress_callback=None):
         
         print("All analyses completed successfully!")
         update_analysis_run_status(run_id, "completed")
+        # This run superseded the previous one for the list; delete the inactive runs now
+        # rather than waiting for the next server start
+        purge_inactive_runs()
 
         if failed_tickers:
             print("\n----------------------")
@@ -683,6 +695,13 @@ def analyze_multi_index(index_info_list, end_date=None, progress_callback=None):
         all_ticker_data = {}
         failed_tickers = []
         
+        # Download the raw price history in batched requests up front; the workers'
+        # download_stock_data calls then read it from the disk cache
+        try:
+            prefetch_stock_data(tickers, end_date=end_date)
+        except Exception as e:
+            logger.warning(f"Prefetch failed, falling back to per-ticker downloads: {e}")
+        
         logger.info(f"Processing {total} combined tickers...")
         
         num_processes = max(1, cpu_count() - 1)
@@ -1020,42 +1039,46 @@ def analyze_multi_index(index_info_list, end_date=None, progress_callback=None):
         if progress_callback:
             progress_callback(92)
         
-        # Compute and save breadth for each index
-        for idx_info in index_info_list:
-            idx_key = idx_info['key']
-            idx_tickers = index_ticker_map.get(idx_key, [])
-            stock_list_name = idx_info['stock_list_name']
+        # Compute and save breadth for each index, committed together at the end
+        with analysis_writer() as writer:
+            for idx_info in index_info_list:
+                idx_key = idx_info['key']
+                idx_tickers = index_ticker_map.get(idx_key, [])
+                stock_list_name = idx_info['stock_list_name']
             
-            logger.info(f"Computing breadth for {idx_key} with {len(idx_tickers)} tickers")
+                logger.info(f"Computing breadth for {idx_key} with {len(idx_tickers)} tickers")
             
-            # CD 1234 breadth for this index
-            cd_breadth = aggregate_signals_for_tickers(df_breakout_1234, idx_tickers, f'CD 1234 {idx_key}')
-            if cd_breadth:
-                save_analysis_result(run_id, stock_list_name, "ALL", 'cd_market_breadth_1234', cd_breadth)
-                logger.info(f"Saved CD breadth for {idx_key}: {len(cd_breadth)} days")
+                # CD 1234 breadth for this index
+                cd_breadth = aggregate_signals_for_tickers(df_breakout_1234, idx_tickers, f'CD 1234 {idx_key}')
+                if cd_breadth:
+                    writer.save(run_id, stock_list_name, "ALL", 'cd_market_breadth_1234', cd_breadth)
+                    logger.info(f"Saved CD breadth for {idx_key}: {len(cd_breadth)} days")
             
-            # MC 1234 breadth for this index
-            mc_breadth = aggregate_signals_for_tickers(df_mc_breakout_1234, idx_tickers, f'MC 1234 {idx_key}')
-            if mc_breadth:
-                save_analysis_result(run_id, stock_list_name, "ALL", 'mc_market_breadth_1234', mc_breadth)
-                logger.info(f"Saved MC breadth for {idx_key}: {len(mc_breadth)} days")
+                # MC 1234 breadth for this index
+                mc_breadth = aggregate_signals_for_tickers(df_mc_breakout_1234, idx_tickers, f'MC 1234 {idx_key}')
+                if mc_breadth:
+                    writer.save(run_id, stock_list_name, "ALL", 'mc_market_breadth_1234', mc_breadth)
+                    logger.info(f"Saved MC breadth for {idx_key}: {len(mc_breadth)} days")
             
-            # CD signal breadth by interval for this index
-            cd_sig_by_intv = aggregate_signals_by_interval(cd_results_1234, f'CD signals {idx_key}', ticker_list=idx_tickers)
-            if cd_sig_by_intv:
-                save_analysis_result(run_id, stock_list_name, "ALL", 'cd_signal_breadth_by_interval', cd_sig_by_intv)
-                logger.info(f"Saved CD signal breadth by interval for {idx_key}: {len(cd_sig_by_intv)} days")
+                # CD signal breadth by interval for this index
+                cd_sig_by_intv = aggregate_signals_by_interval(cd_results_1234, f'CD signals {idx_key}', ticker_list=idx_tickers)
+                if cd_sig_by_intv:
+                    writer.save(run_id, stock_list_name, "ALL", 'cd_signal_breadth_by_interval', cd_sig_by_intv)
+                    logger.info(f"Saved CD signal breadth by interval for {idx_key}: {len(cd_sig_by_intv)} days")
             
-            # MC signal breadth by interval for this index
-            mc_sig_by_intv = aggregate_signals_by_interval(mc_results_1234, f'MC signals {idx_key}', ticker_list=idx_tickers)
-            if mc_sig_by_intv:
-                save_analysis_result(run_id, stock_list_name, "ALL", 'mc_signal_breadth_by_interval', mc_sig_by_intv)
-                logger.info(f"Saved MC signal breadth by interval for {idx_key}: {len(mc_sig_by_intv)} days")
+                # MC signal breadth by interval for this index
+                mc_sig_by_intv = aggregate_signals_by_interval(mc_results_1234, f'MC signals {idx_key}', ticker_list=idx_tickers)
+                if mc_sig_by_intv:
+                    writer.save(run_id, stock_list_name, "ALL", 'mc_signal_breadth_by_interval', mc_sig_by_intv)
+                    logger.info(f"Saved MC signal breadth by interval for {idx_key}: {len(mc_sig_by_intv)} days")
         
         if progress_callback:
             progress_callback(100)
         
         update_analysis_run_status(run_id, "completed")
+        # This run superseded the previous one for the list; delete the inactive runs now
+        # rather than waiting for the next server start
+        purge_inactive_runs()
         logger.info(f"Multi-index analysis completed. Run ID: {run_id}")
         
         if failed_tickers:
@@ -12,11 +12,17 @@ sys.path.append(logic_path)
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from app.api.endpoints import analysis, stocks
-from app.db.database import engine, Base
+from app.db.database import engine, Base, migrate_schema
 from app.db import models
+from app.logic.db_utils import purge_inactive_runs
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
+migrate_schema()
+
+# Physically delete inactive runs left over from before this start (runs also
+# purge after they complete; this catches ones that were interrupted)
+purge_inactive_runs()
 
 import logging
 from logging.handlers import RotatingFileHandler